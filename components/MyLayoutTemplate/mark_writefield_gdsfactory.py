@@ -1,19 +1,40 @@
 
 import gdsfactory as gf
+import hashlib
 import numpy as np
 import string
 from datetime import datetime
 
 try:
-    from .pdk import LAYER, LAYER_TUPLES
+    from .pdk import LAYER, LAYER_TUPLES, activate as activate_pdk
 except ImportError:
-    from pdk import LAYER, LAYER_TUPLES  # when run as script (no parent package), use local pdk
+    from pdk import LAYER, LAYER_TUPLES, activate as activate_pdk  # when run as script (no parent package), use local pdk
+
+# Generators below use LAYER defaults: activate the nanodevice PDK once on import
+activate_pdk()
+
+
+# LAYER enum member -> (gdslayer, gdspurpose), filled on first lookup
+_layer_tuple_cache = {}
 
 
 def _layer_tuple(layer):
     """Normalize layer to (gdslayer, gdspurpose). Prefer LAYER_TUPLES so GDS layer numbers match PDK."""
     if isinstance(layer, tuple):
         return layer
+    try:
+        return _layer_tuple_cache[layer]
+    except (KeyError, TypeError):
+        pass
+    t = _resolve_layer_tuple(layer)
+    try:
+        _layer_tuple_cache[layer] = t
+    except TypeError:
+        pass  # unhashable layer spec: resolve every time
+    return t
+
+
+def _resolve_layer_tuple(layer):
     # Resolve enum by name from PDK (enum .value may be int ordinal, not actual layer number)
     if hasattr(layer, "name") and layer.name in LAYER_TUPLES:
         return LAYER_TUPLES[layer.name]
@@ -670,8 +691,20 @@ def create_corner_marker(
     _component_cache[name] = c
     return c
 
-def create_single_writefield(
-    name: str,
+def _writefield_mark_positions(size: float, mark_offset_from_corner: tuple) -> tuple:
+    """
+    Return the (BL, BR, TL, TR) mark centers of a writefield centered at (0,0).
+    """
+    h_size = size / 2.0
+    ox, oy = mark_offset_from_corner
+    
+    pos_BL = (-h_size + ox, -h_size + oy)
+    pos_BR = (h_size - ox, -h_size + oy)
+    pos_TL = (-h_size + ox, h_size - oy)
+    pos_TR = (h_size - ox, h_size - oy)
+    return pos_BL, pos_BR, pos_TL, pos_TR
+
+def _build_base_writefield(
     size: float,
     mark_q1: gf.Component,
     mark_q2: gf.Component,
@@ -682,28 +715,33 @@ def create_single_writefield(
     caliper_right: gf.Component,
     caliper_bottom: gf.Component,
     caliper_left: gf.Component,
-    label_text: str,
-    label_size: float,
-    label_layer: tuple,
-    label_offset: tuple,
     mark_offset_from_corner: tuple,
     enable_caliper: bool,
-    marker_l_l4: gf.Component = None  # L4 L-marker (same as L3 but on L4 layer)
+    marker_l_l4: gf.Component = None
 ) -> gf.Component:
     """
-    Create a single write field component containing marks, labels, and calipers.
+    Get or create the label-free part of a write field (marks, L-markers, calipers).
+    This geometry is identical for every field of the array, so it is built once.
     Origin (0,0) is the CENTER of the writefield.
     """
+    ox, oy = mark_offset_from_corner
+    cal_suffix = "_Cal" if enable_caliper else ""
+    # The child cell names encode their own geometry and layers; hash them into the
+    # name so a field built from different marks/markers/calipers gets its own cell
+    children = [mark_q1, mark_q2, mark_q3, mark_q4, marker_l, marker_l_l4]
+    if enable_caliper:
+        children += [caliper_top, caliper_right, caliper_bottom, caliper_left]
+    child_key = "|".join(child.name if child is not None else "-" for child in children)
+    child_hash = hashlib.md5(child_key.encode("utf-8")).hexdigest()[:10]
+    name = f"FieldBase_S{size:g}_O{ox:g}_{oy:g}{cal_suffix}_{child_hash}".replace('.', 'p')
+    
+    if name in _component_cache:
+        return _component_cache[name]
+    
     c = gf.Component(name)
     
     h_size = size / 2.0
-    ox, oy = mark_offset_from_corner
-    
-    # Define corners relative to (0,0) center
-    pos_BL = (-h_size + ox, -h_size + oy)
-    pos_BR = (h_size - ox, -h_size + oy)
-    pos_TL = (-h_size + ox, h_size - oy)
-    pos_TR = (h_size - ox, h_size - oy)
+    pos_BL, pos_BR, pos_TL, pos_TR = _writefield_mark_positions(size, mark_offset_from_corner)
     
     # Place Marks (Frames are now included inside the composite mark cells)
     # Q1: TR, Q2: TL, Q3: BL, Q4: BR
@@ -753,7 +791,32 @@ def create_single_writefield(
         # Position: (h_size, h_size)
         c.add_ref(marker_l_l4).rotate(180).move((h_size, h_size))
 
-    # Place Labels
+    # Place Calipers
+    if enable_caliper:
+        c.add_ref(caliper_top).move((0, h_size))
+        c.add_ref(caliper_right).move((h_size, 0))
+        c.add_ref(caliper_bottom).move((0, -h_size))
+        c.add_ref(caliper_left).move((-h_size, 0))
+    
+    _component_cache[name] = c
+    return c
+
+def _add_writefield_labels(
+    parent: gf.Component,
+    label_text: str,
+    center: tuple,
+    size: float,
+    label_size: float,
+    label_layer: tuple,
+    label_offset: tuple,
+    mark_offset_from_corner: tuple
+) -> None:
+    """
+    Add the four quadrant labels of a write field centered at `center` into `parent`.
+    """
+    cx, cy = center
+    pos_BL, pos_BR, pos_TL, pos_TR = _writefield_mark_positions(size, mark_offset_from_corner)
+    
     # Format: (Position, OffsetDirection, Suffix)
     label_configs = [
         (pos_BL, (1, 1), ",3"),   # Q3
@@ -770,10 +833,10 @@ def create_single_writefield(
             layer=label_layer,
             justify='center'
         )
-        text_ref = c << text_comp
+        text_ref = parent << text_comp
         
-        tx = mx + dx * label_offset[0]
-        ty = my + dy * label_offset[1]
+        tx = cx + mx + dx * label_offset[0]
+        ty = cy + my + dy * label_offset[1]
         
         if hasattr(text_ref, 'center'):
             text_ref.center = (tx, ty)
@@ -781,12 +844,59 @@ def create_single_writefield(
             cur_center = text_ref.center
             text_ref.move((tx - cur_center[0], ty - cur_center[1]))
 
-    # Place Calipers
-    if enable_caliper:
-        c.add_ref(caliper_top).move((0, h_size))
-        c.add_ref(caliper_right).move((h_size, 0))
-        c.add_ref(caliper_bottom).move((0, -h_size))
-        c.add_ref(caliper_left).move((-h_size, 0))
+def create_single_writefield(
+    name: str,
+    size: float,
+    mark_q1: gf.Component,
+    mark_q2: gf.Component,
+    mark_q3: gf.Component,
+    mark_q4: gf.Component,
+    marker_l: gf.Component,
+    caliper_top: gf.Component,
+    caliper_right: gf.Component,
+    caliper_bottom: gf.Component,
+    caliper_left: gf.Component,
+    label_text: str,
+    label_size: float,
+    label_layer: tuple,
+    label_offset: tuple,
+    mark_offset_from_corner: tuple,
+    enable_caliper: bool,
+    marker_l_l4: gf.Component = None  # L4 L-marker (same as L3 but on L4 layer)
+) -> gf.Component:
+    """
+    Create a single write field component containing marks, labels, and calipers.
+    Origin (0,0) is the CENTER of the writefield.
+    """
+    c = gf.Component(name)
+    
+    base = _build_base_writefield(
+        size=size,
+        mark_q1=mark_q1,
+        mark_q2=mark_q2,
+        mark_q3=mark_q3,
+        mark_q4=mark_q4,
+        marker_l=marker_l,
+        caliper_top=caliper_top,
+        caliper_right=caliper_right,
+        caliper_bottom=caliper_bottom,
+        caliper_left=caliper_left,
+        mark_offset_from_corner=mark_offset_from_corner,
+        enable_caliper=enable_caliper,
+        marker_l_l4=marker_l_l4
+    )
+    c.add_ref(base)
+    
+    _add_writefield_labels(
+        c,
+        label_text=label_text,
+        center=(0, 0),
+        size=size,
+        label_size=label_size,
+        label_layer=label_layer,
+        label_offset=label_offset,
+        mark_offset_from_corner=mark_offset_from_corner
+    )
         
     return c
 
@@ -1001,10 +1111,26 @@ def generate_writefield_array(
     h_active_w = active_width / 2.0
     h_active_h = active_height / 2.0
     
-    # Four corners
-    # Top-Left corner (Main mark, relative to active area, offset outward)
-    tl_mark_pos = (-h_active_w - global_mark_offset, h_active_h + global_mark_offset)
-    add_global_mark(tl_mark_pos, is_main=True)
+    # Sign of (x, y) offset for each mark, relative to the active area center:
+    # four corners (Top-Left is the main mark) followed by the four edge midpoints
+    global_mark_signs = np.array([
+        [-1, 1],   # Top-Left corner (Main)
+        [1, 1],    # Top-Right corner
+        [-1, -1],  # Bottom-Left corner
+        [1, -1],   # Bottom-Right corner
+        [0, 1],    # Top edge (center)
+        [0, -1],   # Bottom edge (center)
+        [-1, 0],   # Left edge (center)
+        [1, 0],    # Right edge (center)
+    ])
+    global_mark_positions = (
+        global_mark_signs * [h_active_w + global_mark_offset, h_active_h + global_mark_offset]
+    ).tolist()
+    
+    for idx, pos in enumerate(global_mark_positions):
+        add_global_mark(tuple(pos), is_main=(idx == 0))
+    
+    tl_mark_pos = tuple(global_mark_positions[0])
     
     # Add info text to the right of the Top-Left global mark (DE = dummy edge, 样品边到有效区边的距离)
     _offset_um = mark_offset_from_corner[0] if isinstance(mark_offset_from_corner, (tuple, list)) else mark_offset_from_corner
@@ -1082,18 +1208,20 @@ def generate_writefield_array(
                     dbu = getattr(getattr(text_comp, 'kcl', None), 'dbu', 0.001)
                     for layer_spec, polygons in polygons_dict.items():
                         if layer_spec == layer_mark:
-                            region = db.Region()
+                            # Convert first, then build the Region in one bulk call
+                            int_polys = []
                             for poly in polygons:
                                 if isinstance(poly, db.DPolygon):
-                                    region.insert(db.Polygon.from_dpoly(poly))
+                                    int_polys.append(db.Polygon.from_dpoly(poly))
                                 elif isinstance(poly, db.Polygon):
-                                    region.insert(poly)
+                                    int_polys.append(poly)
                                 else:
                                     try:
                                         dpoly = db.DPolygon(poly)
-                                        region.insert(db.Polygon.from_dpoly(dpoly))
+                                        int_polys.append(db.Polygon.from_dpoly(dpoly))
                                     except:
                                         offset_comp.add_polygon(poly, layer=layer_spec)
+                            region = db.Region(int_polys)
                             # Apply offset (size expects distance in database units)
                             # info_text_line_width is in microns, convert to database units
                             offset_dbu = int(info_text_line_width / dbu)
@@ -1118,28 +1246,6 @@ def generate_writefield_array(
         # 2. Top edge (ymax) aligns with the calculated Y position for this line
         line_top_y = info_y_start - idx * info_text_size * 1.5
         text_ref.move((info_x - text_ref.xmin, line_top_y - text_ref.ymax))
-    
-    # Top-Right corner (relative to active area, offset outward)
-    add_global_mark((h_active_w + global_mark_offset, h_active_h + global_mark_offset))
-    
-    # Bottom-Left corner (relative to active area, offset outward)
-    add_global_mark((-h_active_w - global_mark_offset, -h_active_h - global_mark_offset))
-    
-    # Bottom-Right corner (relative to active area, offset outward)
-    add_global_mark((h_active_w + global_mark_offset, -h_active_h - global_mark_offset))
-    
-    # Four edges (midpoints)
-    # Top edge (center)
-    add_global_mark((0, h_active_h + global_mark_offset))
-    
-    # Bottom edge (center)
-    add_global_mark((0, -h_active_h - global_mark_offset))
-    
-    # Left edge (center)
-    add_global_mark((-h_active_w - global_mark_offset, 0))
-    
-    # Right edge (center)
-    add_global_mark((h_active_w + global_mark_offset, 0))
 
     # 4. Create Shared Components (Calipers)
     caliper_top = None
@@ -1148,57 +1254,38 @@ def generate_writefield_array(
     caliper_left = None
 
     if enable_caliper:
-        # Top Ruler (Horizontal axis, Ticks Down/-1)
-        caliper_top = create_caliper(
-            num_ticks_side=caliper_top_right_num_side,
-            pitch=caliper_top_right_pitch,
-            width=caliper_width,
-            tick_length=caliper_top_right_tick_length,
-            center_tick_length=caliper_top_right_center_length,
-            layer=layer_caliper,
-            orientation="horizontal",
-            tick_direction=-1,
-            limit_length=writefield_size
-        )
+        # side -> (num_ticks_side, pitch, tick_length, center_tick_length, orientation, tick_direction)
+        # Top/Right use the large pitch, ticks pointing inward (-1);
+        # Bottom/Left use the small pitch, ticks pointing inward (+1).
+        top_right = (caliper_top_right_num_side, caliper_top_right_pitch,
+                     caliper_top_right_tick_length, caliper_top_right_center_length)
+        bottom_left = (caliper_bottom_left_num_side, caliper_bottom_left_pitch,
+                       caliper_bottom_left_tick_length, caliper_bottom_left_center_length)
+        caliper_specs = {
+            "top": (*top_right, "horizontal", -1),
+            "right": (*top_right, "vertical", -1),
+            "bottom": (*bottom_left, "horizontal", 1),
+            "left": (*bottom_left, "vertical", 1),
+        }
         
-        # Right Ruler (Vertical axis, Ticks Left/-1)
-        caliper_right = create_caliper(
-            num_ticks_side=caliper_top_right_num_side,
-            pitch=caliper_top_right_pitch,
-            width=caliper_width,
-            tick_length=caliper_top_right_tick_length,
-            center_tick_length=caliper_top_right_center_length,
-            layer=layer_caliper,
-            orientation="vertical",
-            tick_direction=-1,
-            limit_length=writefield_size
-        )
-        
-        # Bottom Ruler (Horizontal axis, Ticks Up/1)
-        caliper_bottom = create_caliper(
-            num_ticks_side=caliper_bottom_left_num_side,
-            pitch=caliper_bottom_left_pitch,
-            width=caliper_width,
-            tick_length=caliper_bottom_left_tick_length,
-            center_tick_length=caliper_bottom_left_center_length,
-            layer=layer_caliper,
-            orientation="horizontal",
-            tick_direction=1,
-            limit_length=writefield_size
-        )
+        calipers = {}
+        for side, (num_side, pitch, tick_len, center_len, orientation, direction) in caliper_specs.items():
+            calipers[side] = create_caliper(
+                num_ticks_side=num_side,
+                pitch=pitch,
+                width=caliper_width,
+                tick_length=tick_len,
+                center_tick_length=center_len,
+                layer=layer_caliper,
+                orientation=orientation,
+                tick_direction=direction,
+                limit_length=writefield_size
+            )
         
-        # Left Ruler (Vertical axis, Ticks Right/1)
-        caliper_left = create_caliper(
-            num_ticks_side=caliper_bottom_left_num_side,
-            pitch=caliper_bottom_left_pitch,
-            width=caliper_width,
-            tick_length=caliper_bottom_left_tick_length,
-            center_tick_length=caliper_bottom_left_center_length,
-            layer=layer_caliper,
-            orientation="vertical",
-            tick_direction=1,
-            limit_length=writefield_size
-        )
+        caliper_top = calipers["top"]
+        caliper_right = calipers["right"]
+        caliper_bottom = calipers["bottom"]
+        caliper_left = calipers["left"]
 
     # 5. Tiling Write Fields (nx, ny already calculated above)
     total_grid_width = nx * writefield_size
@@ -1207,41 +1294,61 @@ def generate_writefield_array(
     start_x = -total_grid_width / 2.0
     start_y = -total_grid_height / 2.0
     
+    # Centers of the WriteFields along each axis
+    # Reverse j order so that j=0 corresponds to top row (A1 at top-left)
+    wf_centers_x = (start_x + (np.arange(nx) + 0.5) * writefield_size).tolist()
+    wf_centers_y = (start_y + (ny - 1 - np.arange(ny) + 0.5) * writefield_size).tolist()
+    
+    col_labels = [index_to_letters(i) for i in range(nx)]  # Column (x-direction) uses letters
+    row_labels = [str(j + 1) for j in range(ny)]  # Row (y-direction) uses numbers
+    
+    # Marks, L-markers and calipers are identical for every field: build them once
+    base_field = _build_base_writefield(
+        size=writefield_size,
+        mark_q1=mark_q1,
+        mark_q2=mark_q2,
+        mark_q3=mark_q3,
+        mark_q4=mark_q4,
+        marker_l=marker_l,
+        caliper_top=caliper_top,
+        caliper_right=caliper_right,
+        caliper_bottom=caliper_bottom,
+        caliper_left=caliper_left,
+        mark_offset_from_corner=mark_offset_from_corner,
+        enable_caliper=enable_caliper,
+        marker_l_l4=marker_l_l4
+    )
+    
+    # One regular array reference covers the whole grid (a single AREF in GDS);
+    # its first element is the bottom-left field
+    field_array = gf.components.array(
+        component=base_field,
+        columns=nx,
+        rows=ny,
+        column_pitch=writefield_size,
+        row_pitch=writefield_size,
+        add_ports=False
+    )
+    c.add_ref(field_array).move((start_x + writefield_size / 2.0, start_y + writefield_size / 2.0))
+    
+    # Only the labels differ between fields
     for i in range(nx):
+        wf_center_x = wf_centers_x[i]
+        col_label = col_labels[i]
         for j in range(ny):
-            # Calculate Center of the WriteField
-            wf_center_x = start_x + i * writefield_size + writefield_size / 2.0
-            # Reverse j order so that j=0 corresponds to top row (A1 at top-left)
-            wf_center_y = start_y + (ny - 1 - j) * writefield_size + writefield_size / 2.0
-            
-            col_label = index_to_letters(i)  # Column (x-direction) uses letters
-            row_label = str(j + 1)  # Row (y-direction) uses numbers
-            label_text = f"{col_label}{row_label}"
-            
-            cell_name = f"Field_{label_text}"
+            wf_center_y = wf_centers_y[j]
+            label_text = f"{col_label}{row_labels[j]}"
             
-            wf_cell = create_single_writefield(
-                name=cell_name,
-                size=writefield_size,
-                mark_q1=mark_q1,
-                mark_q2=mark_q2,
-                mark_q3=mark_q3,
-                mark_q4=mark_q4,
-                marker_l=marker_l,
-                caliper_top=caliper_top,
-                caliper_right=caliper_right,
-                caliper_bottom=caliper_bottom,
-                caliper_left=caliper_left,
+            _add_writefield_labels(
+                c,
                 label_text=label_text,
+                center=(wf_center_x, wf_center_y),
+                size=writefield_size,
                 label_size=label_size,
                 label_layer=layer_mark,
                 label_offset=label_offset,
-                mark_offset_from_corner=mark_offset_from_corner,
-                enable_caliper=enable_caliper,
-                marker_l_l4=marker_l_l4
+                mark_offset_from_corner=mark_offset_from_corner
             )
-            
-            c.add_ref(wf_cell).move((wf_center_x, wf_center_y))
 
     return c
 
@@ -3,7 +3,47 @@ import gdsfactory as gf
 import numpy as np
 from PIL import Image
 import os
-from typing import Callable, Tuple, Optional, Union
+from functools import lru_cache
+from typing import Callable, Iterable, Tuple, Optional, Union
+
+# =============================================================================
+# CACHED PRIMITIVES
+# =============================================================================
+# Unit cells are built from a handful of gdsfactory primitives with very few
+# distinct arguments; memoize them so repeated builds skip gdsfactory dispatch.
+
+@lru_cache(maxsize=1024)
+def _rect(size: tuple, layer: tuple, centered: bool) -> gf.Component:
+    return gf.components.rectangle(size=size, layer=layer, centered=centered)
+
+@lru_cache(maxsize=1024)
+def _ellipse(radii: tuple, layer: tuple) -> gf.Component:
+    return gf.components.ellipse(radii=radii, layer=layer)
+
+@lru_cache(maxsize=1024)
+def _circle(radius: float, layer: tuple) -> gf.Component:
+    return gf.components.circle(radius=radius, layer=layer)
+
+@lru_cache(maxsize=1024)
+def _bend_circular(radius: float, angle: float, width: float, layer: tuple) -> gf.Component:
+    return gf.components.bend_circular(
+        radius=radius,
+        angle=angle,
+        width=width,
+        layer=layer,
+        allow_min_radius_violation=True
+    )
+
+
+def _rotated_box(x0: float, y0: float, x1: float, y1: float, rotation: float) -> np.ndarray:
+    """
+    Corners of the box [x0, x1] x [y0, y1] rotated by `rotation` degrees about (0, 0).
+    """
+    theta = np.radians(rotation)
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+    corners = np.array([(x0, y0), (x1, y0), (x1, y1), (x0, y1)], dtype=float)
+    return corners @ np.array([[cos_t, sin_t], [-sin_t, cos_t]])
+
 
 # =============================================================================
 # UNIT CELL GENERATORS
@@ -25,7 +65,7 @@ def cell_rectangle(
         layer: GDS layer.
     """
     c = gf.Component()
-    rect = c << gf.components.rectangle(size=(length, width), layer=layer, centered=True)
+    rect = c << _rect((length, width), layer, True)
     rect.rotate(rotation)
     return c
 
@@ -48,19 +88,13 @@ def cell_clock(
     """
     c = gf.Component()
     
-    # Arm 1: Along X axis
-    a1 = gf.components.rectangle(size=(arm_length, arm_width), layer=layer, centered=False)
-    ref1 = c << a1
-    ref1.movey(-arm_width/2) # Center vertically
+    # Both arms start at the origin and are centered vertically on their axis.
+    # Arm 1 lies along the overall rotation, arm 2 is rotated further by 'angle';
+    # each is rotated once when its vertices are computed.
+    for arm_rotation in (rotation, rotation + angle):
+        pts = _rotated_box(0.0, -arm_width/2, arm_length, arm_width/2, arm_rotation)
+        c.add_polygon(pts, layer=layer)
     
-    # Arm 2: Rotated by 'angle'
-    a2 = gf.components.rectangle(size=(arm_length, arm_width), layer=layer, centered=False)
-    ref2 = c << a2
-    ref2.movey(-arm_width/2)
-    ref2.rotate(angle)
-    
-    # Rotate entire structure
-    c.rotate(rotation)
     return c
 
 def cell_t_shape(
@@ -84,15 +118,19 @@ def cell_t_shape(
     """
     c = gf.Component()
     
-    # Top bar
-    top = c << gf.components.rectangle(size=(length_top, width_top), layer=layer, centered=True)
-    top.movey(length_stem / 2 + width_top / 2)
+    # Top bar (sits on top of the stem)
+    top_y = length_stem / 2 + width_top / 2
+    c.add_polygon(
+        _rotated_box(-length_top/2, top_y - width_top/2, length_top/2, top_y + width_top/2, rotation),
+        layer=layer
+    )
     
-    # Stem
-    stem = c << gf.components.rectangle(size=(width_stem, length_stem), layer=layer, centered=True)
+    # Stem (centered at the origin)
+    c.add_polygon(
+        _rotated_box(-width_stem/2, -length_stem/2, width_stem/2, length_stem/2, rotation),
+        layer=layer
+    )
     
-    # Rotate
-    c.rotate(rotation)
     return c
 
 def cell_ellipse(
@@ -111,7 +149,7 @@ def cell_ellipse(
         layer: GDS layer.
     """
     c = gf.Component()
-    ellipse = c << gf.components.ellipse(radii=(major_axis/2, minor_axis/2), layer=layer)
+    ellipse = c << _ellipse((major_axis/2, minor_axis/2), layer)
     ellipse.rotate(rotation)
     return c
 
@@ -140,13 +178,7 @@ def cell_split_ring(
     bend_angle = 360.0 - gap_angle
     
     # bend_circular creates a bend starting from (0,0)
-    split_ring = c << gf.components.bend_circular(
-        radius=center_radius,
-        angle=bend_angle,
-        width=width,
-        layer=layer,
-        allow_min_radius_violation=True
-    )
+    split_ring = c << _bend_circular(center_radius, bend_angle, width, layer)
     
     # Center the split ring
     # bend_circular starts at (0,0) tangent to x-axis. Center of curvature is at (0, center_radius).
@@ -174,6 +206,24 @@ def cell_split_ring(
     
     return c
 
+def _build_circle(size: float, rotation: float, layer: tuple) -> gf.Component:
+    """Circle of diameter `size` (rotation has no effect)."""
+    c = gf.Component()
+    c << _circle(size/2, layer)
+    return c
+
+def _build_square(size: float, rotation: float, layer: tuple) -> gf.Component:
+    """Centered square of side `size`, rotated by `rotation` degrees."""
+    c = gf.Component()
+    comp = c << _rect((size, size), layer, True)
+    comp.rotate(rotation)
+    return c
+
+_SHAPE_BUILDERS = {
+    "circle": _build_circle,
+    "square": _build_square,
+}
+
 def cell_variable_size(
     shape: str = "square",
     size: float = 1.0,
@@ -184,18 +234,45 @@ def cell_variable_size(
     Generates a square or circle of variable size.
     
     Args:
-        shape: "square" or "circle".
+        shape: "square" or "circle" (anything else falls back to "square").
         size: Side length (square) or Diameter (circle).
         rotation: Rotation angle (relevant for square).
         layer: GDS layer.
     """
-    c = gf.Component()
-    if shape == "circle":
-        comp = c << gf.components.circle(radius=size/2, layer=layer)
-    else:
-        comp = c << gf.components.rectangle(size=(size, size), layer=layer, centered=True)
-        comp.rotate(rotation)
-    return c
+    return _SHAPE_BUILDERS.get(shape, _build_square)(size, rotation, layer)
+
+
+# =============================================================================
+# UNIT CELL CACHE
+# =============================================================================
+
+@lru_cache(maxsize=4096)
+def _cached_cell(cell_function: Callable, items: tuple) -> gf.Component:
+    """
+    Builds (or reuses) a unit cell for a given generator and frozen kwargs.
+    
+    Shared across calls of generate_metasurface_from_image so identical
+    unit cells are only constructed once per process.
+    """
+    return cell_function(**dict(items))
+
+
+def _group_pixel_positions(img_array: np.ndarray) -> dict:
+    """
+    Groups pixel positions by grayscale value.
+    
+    Args:
+        img_array: 2D uint8 image array.
+        
+    Returns:
+        dict: Maps each pixel value present in the image (as a Python int) to
+              a 1D array of flat (row-major) pixel indices with that value.
+    """
+    flat = img_array.ravel()
+    order = np.argsort(flat, kind="stable")
+    values, counts = np.unique(flat[order], return_counts=True)
+    groups = np.split(order, np.cumsum(counts)[:-1])
+    return dict(zip(values.tolist(), groups))
 
 
 # =============================================================================
@@ -212,7 +289,8 @@ def generate_metasurface_from_image(
     pixel_to_nm_scale: float = None,
     invert_image: bool = False,
     layer: tuple = (1, 0),
-    top_cell_name: str = "Metasurface_Array"
+    top_cell_name: str = "Metasurface_Array",
+    skip_values: Optional[Iterable[int]] = None
 ) -> gf.Component:
     """
     Generates a metasurface array based on a grayscale image.
@@ -232,6 +310,8 @@ def generate_metasurface_from_image(
         invert_image: If True, 0 becomes 255 and vice versa.
         layer: GDS layer to place structures on.
         top_cell_name: Name of the top-level GDS cell.
+        skip_values: Pixel values (after inversion) that are treated as background
+                     and get no unit cell, e.g. {0}. None places a cell on every pixel.
         
     Returns:
         gf.Component: The generated top-level component.
@@ -242,10 +322,12 @@ def generate_metasurface_from_image(
         raise FileNotFoundError(f"Image not found: {image_path}")
     
     img = Image.open(image_path).convert('L') # Convert to grayscale
-    img_array = np.array(img)
+    img_array = np.asarray(img, dtype=np.uint8)
     
     if invert_image:
-        img_array = 255 - img_array
+        # asarray may share PIL's read-only buffer: copy once, then invert in place
+        img_array = img_array.copy()
+        np.subtract(255, img_array, out=img_array)
         
     height, width = img_array.shape
     
@@ -255,36 +337,36 @@ def generate_metasurface_from_image(
     # 2. Create Top Component
     top = gf.Component(top_cell_name)
     
-    # 3. Iterate pixels and place cells
-    # We can cache identical cells to reduce GDS size/memory usage
-    cell_cache = {}
+    # 3. Place cells, one pixel value at a time
+    # Identical cells are cached (module-wide) to reduce GDS size/memory usage,
+    # and each distinct value only resolves its cell once.
+    pixel_groups = _group_pixel_positions(img_array)
+    skip_values = frozenset(skip_values) if skip_values else frozenset()
+    
+    # Cell positions depend only on the column / row index
+    xs = (np.arange(width) * pitch_x).tolist()
+    ys = ((height - 1 - np.arange(height)) * pitch_y).tolist()
+    
+    # Resolve the unit cell of every distinct pixel value once (value -> cell LUT)
+    cell_lut = {}
+    for val in pixel_groups:
+        if val in skip_values:
+            continue
+        
+        # Determine cell parameters from pixel value (copied, the caller's dict is not modified)
+        if value_map_func:
+            kwargs = dict(value_map_func(val))
+        else:
+            kwargs = {"rotation": val * 180.0 / 255.0, "length": pitch_x * 0.8, "width": pitch_x * 0.2}
+        kwargs.setdefault("layer", layer)
+        
+        cell_lut[val] = _cached_cell(cell_function, tuple(sorted(kwargs.items())))
     
-    for y in range(height):
-        for x in range(width):
-            val = img_array[y, x]
-            
-            # Determine cell parameters from pixel value
-            if value_map_func:
-                kwargs = value_map_func(val)
-            else:
-                kwargs = {"rotation": val * 180.0 / 255.0, "length": pitch_x * 0.8, "width": pitch_x * 0.2}
-            
-            if "layer" not in kwargs:
-                kwargs["layer"] = layer
-            
-            cache_key = tuple(sorted(kwargs.items()))
-            
-            if cache_key in cell_cache:
-                cell = cell_cache[cache_key]
-            else:
-                cell = cell_function(**kwargs)
-                cell_cache[cache_key] = cell
-            
-            pos_x = x * pitch_x
-            pos_y = (height - 1 - y) * pitch_y 
-            
+    for val, cell in cell_lut.items():
+        rows, cols = np.divmod(pixel_groups[val], width)
+        for y, x in zip(rows.tolist(), cols.tolist()):
             ref = top << cell
-            ref.move((pos_x, pos_y))
+            ref.move((xs[x], ys[y]))
             
     # 4. Save GDS
     top.write_gds(output_gds)
@@ -297,77 +379,85 @@ def generate_metasurface_from_image(
 # EXAMPLES AND DEMO
 # =============================================================================
 
+# Value maps used by the demo. They live at module level so they can be
+# pickled into worker processes.
+
+# Example 1: Rotating Rectangles (Pancharatnam-Berry phase)
+# Map 0-255 to 0-180 degrees
+def map_pb_phase(val):
+    return {
+        "length": 0.8,
+        "width": 0.2,
+        "rotation": val * 180.0 / 255.0
+    }
+
+# Example 2: Variable Diameter Circles (Propagation phase)
+# Map 0-255 to diameter 0.2 - 0.9 um
+def map_prop_phase(val):
+    min_d = 0.2
+    max_d = 0.9
+    d = min_d + (val / 255.0) * (max_d - min_d)
+    return {
+        "shape": "circle",
+        "size": d
+    }
+
+# Example 3: Rotating Split Ring
+def map_split_ring(val):
+    return {
+        "radius": 0.4,
+        "width": 0.1,
+        "gap_angle": 45,
+        "rotation": val * 360.0 / 255.0 # Full 360 rotation
+    }
+
+def _run_demo(kwargs: dict) -> str:
+    """Worker entry: generate one demo layout and return its GDS path."""
+    generate_metasurface_from_image(**kwargs)
+    return kwargs["output_gds"]
+
+
 if __name__ == "__main__":
     import sys
     import os
+    from concurrent.futures import ProcessPoolExecutor
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
     from config import get_gds_path, get_image_path
     
     # Create a dummy gradient image for demonstration if one doesn't exist
     demo_image_path = get_image_path("gradient_test.png")
     width, height = 50, 50
-    gradient = np.zeros((height, width), dtype=np.uint8)
-    for i in range(width):
-        gradient[:, i] = int(i * 255 / (width - 1))
+    gradient = np.broadcast_to(np.linspace(0, 255, width, dtype=np.uint8), (height, width)).copy()
     
     Image.fromarray(gradient).save(demo_image_path)
     print(f"Created test image: {demo_image_path}")
     
-    # Example 1: Rotating Rectangles (Pancharatnam-Berry phase)
-    # Map 0-255 to 0-180 degrees
-    def map_pb_phase(val):
-        return {
-            "length": 0.8,
-            "width": 0.2,
-            "rotation": val * 180.0 / 255.0
-        }
-    
-    generate_metasurface_from_image(
-        image_path=demo_image_path,
-        output_gds=get_gds_path("metasurface_pb_rect.gds"),
-        pitch_x=1.0,
-        pitch_y=1.0,
-        cell_function=cell_rectangle,
-        value_map_func=map_pb_phase,
-        top_cell_name="Metasurface_PB_Rect"
-    )
-    
-    # Example 2: Variable Diameter Circles (Propagation phase)
-    # Map 0-255 to diameter 0.2 - 0.9 um
-    def map_prop_phase(val):
-        min_d = 0.2
-        max_d = 0.9
-        d = min_d + (val / 255.0) * (max_d - min_d)
-        return {
-            "shape": "circle",
-            "size": d
-        }
-        
-    generate_metasurface_from_image(
-        image_path=demo_image_path,
-        output_gds=get_gds_path("metasurface_variable_circle.gds"),
-        pitch_x=1.0,
-        pitch_y=1.0,
-        cell_function=cell_variable_size,
-        value_map_func=map_prop_phase,
-        top_cell_name="Metasurface_Var_Circle"
-    )
-    
-    # Example 3: Rotating Split Ring
-    def map_split_ring(val):
-        return {
-            "radius": 0.4,
-            "width": 0.1,
-            "gap_angle": 45,
-            "rotation": val * 360.0 / 255.0 # Full 360 rotation
-        }
-
-    generate_metasurface_from_image(
-        image_path=demo_image_path,
-        output_gds=get_gds_path("metasurface_split_ring.gds"),
-        pitch_x=1.0,
-        pitch_y=1.0,
-        cell_function=cell_split_ring,
-        value_map_func=map_split_ring,
-        top_cell_name="Metasurface_Split_Ring"
-    )
+    common = dict(image_path=demo_image_path, pitch_x=1.0, pitch_y=1.0)
+    demos = [
+        dict(
+            common,
+            output_gds=get_gds_path("metasurface_pb_rect.gds"),
+            cell_function=cell_rectangle,
+            value_map_func=map_pb_phase,
+            top_cell_name="Metasurface_PB_Rect"
+        ),
+        dict(
+            common,
+            output_gds=get_gds_path("metasurface_variable_circle.gds"),
+            cell_function=cell_variable_size,
+            value_map_func=map_prop_phase,
+            top_cell_name="Metasurface_Var_Circle"
+        ),
+        dict(
+            common,
+            output_gds=get_gds_path("metasurface_split_ring.gds"),
+            cell_function=cell_split_ring,
+            value_map_func=map_split_ring,
+            top_cell_name="Metasurface_Split_Ring"
+        ),
+    ]
+    
+    # The three layouts are independent: build and write them in separate processes
+    with ProcessPoolExecutor(max_workers=len(demos)) as executor:
+        for gds_path in executor.map(_run_demo, demos):
+            print(f"Demo finished: {gds_path}")
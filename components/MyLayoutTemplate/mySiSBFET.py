@@ -8,9 +8,14 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import klayout.db as db
+try:
+    import pya as _pya
+    Region = _pya.Region
+except Exception:
+    Region = db.Region
 from utils.geometry import GeometryUtils
 from utils.mark_utils import MarkUtils
-from utils.fanout_utils import draw_pad, draw_trapezoidal_fanout
+from utils.fanout_utils import PadInfo, draw_pad, draw_trapezoidal_fanout
 from utils.text_utils import TextUtils
 from utils.digital_utils import DigitalDisplay
 from config import LAYER_DEFINITIONS, DEFAULT_UNIT_SCALE
@@ -18,6 +23,31 @@ from config import LAYER_DEFINITIONS, DEFAULT_UNIT_SCALE
 class FET:
     """场效应晶体管器件类"""
     
+    # 标记类型 -> (MarkUtils函数, 是否需要线宽参数)
+    _MARK_TABLE = {
+        'cross': (MarkUtils.cross, True),
+        'square': (MarkUtils.square, False),
+        'circle': (MarkUtils.circle, False),
+        'diamond': (MarkUtils.diamond, False),
+        'triangle': (MarkUtils.triangle, False),
+        'l': (MarkUtils.l, True),
+        't': (MarkUtils.t, True),
+        'semi_cross': (MarkUtils.semi_cross, True),
+        'cross_pos': (MarkUtils.cross_pos, False),
+        'cross_neg': (MarkUtils.cross_neg, False),
+        'l_shape': (MarkUtils.l_shape, False),
+        't_shape': (MarkUtils.t_shape, False),
+        'sq_missing': (MarkUtils.sq_missing, False),
+        'sq_missing_border': (MarkUtils.sq_missing_border, False),
+        'cross_tri': (MarkUtils.cross_tri, False),
+        'regular_polygon': (MarkUtils.regular_polygon, False),
+        'chamfered_octagon': (MarkUtils.chamfered_octagon, False),
+    }
+    # 四个角落相对器件中心的方向: [左上, 右上, 左下, 右下]
+    _MARK_CORNER_SIGNS = ((-1, 1), (1, 1), (-1, -1), (1, -1))
+    # 单元格实例插入共用的恒等变换
+    _IDENTITY_TRANS = db.Trans(0, 0)
+    
     def __init__(self, layout=None, **kwargs):
         """
         初始化FET器件类
@@ -27,6 +57,9 @@ class FET:
             **kwargs: 其他参数，包括器件、标记、扇出、编号等相关参数
         """
         self.layout = layout or db.Layout()
+        # 每μm对应的数据库单位数：与draw_pad/MarkUtils等共用GeometryUtils.UNIT_SCALE，
+        # 不随layout.dbu变化，保证各部分几何尺度一致
+        self._dbu_inv = int(round(GeometryUtils.UNIT_SCALE))
         self.setup_layers()
         
         # ===== 器件核心参数 =====
@@ -47,9 +80,9 @@ class FET:
         # 'cross', 'square', 'circle', 'diamond', 'triangle', 'l', 't', 
         # 'semi_cross', 'cross_pos', 'cross_neg', 'l_shape', 't_shape',
         # 'sq_missing', 'sq_missing_border', 'cross_tri', 'regular_polygon', 'chamfered_octagon'
-        self.mark_types = kwargs.get('mark_types', ['sq_missing', 'l', 'l', 'cross_tri'])  # [左上, 右上, 左下, 右下]
+        self.mark_types = tuple(kwargs.get('mark_types', ('sq_missing', 'l', 'l', 'cross_tri')))  # [左上, 右上, 左下, 右下]
         # 四个角落标记的旋转角度: 0=不旋转, 1=90度, 2=180度, 3=270度
-        self.mark_rotations = kwargs.get('mark_rotations', [0, 0, 2, 1])  # [左上, 右上, 左下, 右下]
+        self.mark_rotations = tuple(kwargs.get('mark_rotations', (0, 0, 2, 1)))  # [左上, 右上, 左下, 右下]
         
         # ===== 扇出参数 =====
         self.outer_pad_size = kwargs.get('outer_pad_size', 100.0)   # 外部焊盘尺寸 (μm)
@@ -86,12 +119,28 @@ class FET:
         self.label_offset_y = kwargs.get('label_offset_y', 0.0)  # 编号位置Y偏移量 (μm)
         self.use_digital_display = kwargs.get('use_digital_display', False)  # 是否使用DigitalDisplay，默认False（使用TextUtils）
         
+        # ===== 字符几何缓存（原点处生成，按位置平移复用） =====
+        self._glyph_cache = {}
+        self._digit_cache = {}
+        self._pad_cache = {}
+        # 对准标记单元格缓存（与器件参数无关，按标记设置复用）
+        self._marks_cells = {}
+        
     def setup_layers(self):
         """设置图层"""
         for layer_name, layer_info in LAYER_DEFINITIONS.items():
             # 在KLayout中，使用layer()方法获取或创建图层
             # layer()方法需要(layer_number, datatype)参数
             self.layout.layer(layer_info['id'], 0)  # 使用datatype=0
+        
+        # 缓存各几何方法使用的图层编号，避免每个器件重复查表
+        self._lid_bottom_gate = LAYER_DEFINITIONS['bottom_gate']['id']
+        self._lid_top_dielectric = LAYER_DEFINITIONS['top_dielectric']['id']
+        self._lid_channel = LAYER_DEFINITIONS['channel']['id']
+        self._lid_source_drain = LAYER_DEFINITIONS['source_drain']['id']
+        self._lid_top_gate = LAYER_DEFINITIONS['top_gate']['id']
+        self._lid_alignment = LAYER_DEFINITIONS['alignment_marks']['id']
+        self._lid_labels = LAYER_DEFINITIONS['labels']['id']
     
     def set_device_parameters(self, ch_width=None, ch_len=None, gate_space=None, gate_width=None):
         """
@@ -120,59 +169,135 @@ class FET:
             cell: 目标单元格
             x, y: 器件中心坐标
         """
-        layer_id = LAYER_DEFINITIONS['bottom_gate']['id']
+        layer_id = self._lid_bottom_gate
+        
+        # 左栅极中心X：右边缘距离中心 gate_space/2
+        x_left = x - self.gate_space/2 - self.gate_width/2
         
         # 底栅1电极 (左侧)
         # Inner pad - 左栅极右边缘距离中心 gate_space/2
-        inner_pad1 = draw_pad(
-            center=(x - self.gate_space/2 - self.gate_width/2, y),
+        inner_pad1 = self._electrode_pad(
+            center=(x_left, y),
             length=self.gate_width,
             width=self.ch_width * self.bottom_gate_inner_width_ratio,
-            chamfer_size=0 if self.bottom_gate_inner_chamfer == 'none' else self.chamfer_size,
             chamfer_type=self.bottom_gate_inner_chamfer
         )
-        cell.shapes(layer_id).insert(inner_pad1.polygon)
         
         # Outer pad
-        outer_pad1 = draw_pad(
-            center=(x - self.bottom_gate_outer_offset_x - self.gate_space/2 - self.gate_width/2, 
-                   y + self.bottom_gate_outer_offset_y),
+        outer_pad1 = self._electrode_pad(
+            center=(x_left - self.bottom_gate_outer_offset_x, y + self.bottom_gate_outer_offset_y),
             length=self.outer_pad_size,
             width=self.outer_pad_size,
-            chamfer_size=0 if self.bottom_gate_outer_chamfer == 'none' else self.chamfer_size,
             chamfer_type=self.bottom_gate_outer_chamfer
         )
-        cell.shapes(layer_id).insert(outer_pad1.polygon)
         
         # 梯形扇出
         fanout1 = draw_trapezoidal_fanout(inner_pad1, outer_pad1)
-        cell.shapes(layer_id).insert(fanout1)
         
-        # 底栅2电极 (右侧)
-        # Inner pad - 右栅极左边缘距离中心 gate_space/2
-        inner_pad2 = draw_pad(
-            center=(x + self.gate_space/2 + self.gate_width/2, y),
-            length=self.gate_width,
-            width=self.ch_width * self.bottom_gate_inner_width_ratio,
-            chamfer_size=0 if self.bottom_gate_inner_chamfer == 'none' else self.chamfer_size,
-            chamfer_type=self.bottom_gate_inner_chamfer
-        )
-        cell.shapes(layer_id).insert(inner_pad2.polygon)
+        # 底栅2电极 (右侧)：与左侧关于器件中心竖直轴镜像
+        mirror = self._mirror_trans(x)
         
-        # Outer pad
-        outer_pad2 = draw_pad(
-            center=(x + self.bottom_gate_outer_offset_x + self.gate_space/2 + self.gate_width/2, 
-                   y + self.bottom_gate_outer_offset_y),
-            length=self.outer_pad_size,
-            width=self.outer_pad_size,
-            chamfer_size=0 if self.bottom_gate_outer_chamfer == 'none' else self.chamfer_size,
-            chamfer_type=self.bottom_gate_outer_chamfer
+        # 一次性插入所有多边形
+        polys = [inner_pad1.polygon, outer_pad1.polygon, fanout1]
+        polys += [poly.transformed(mirror) for poly in polys]
+        cell.shapes(layer_id).insert(Region(polys))
+    
+    def _electrode_pad(self, center, length, width, chamfer_type):
+        """
+        创建电极焊盘；无倒角时直接由整数矩形构造，跳过draw_pad的倒角分支；
+        有倒角时同一尺寸只在原点计算一次顶点，之后平移复用
+        
+        Args:
+            center: 焊盘中心 (x, y) (μm)
+            length, width: 焊盘尺寸 (μm)
+            chamfer_type: 倒角类型，'none' 时使用矩形快速路径
+            
+        Returns:
+            PadInfo
+        """
+        if chamfer_type == 'none':
+            box = self._centered_box(center[0], center[1], length, width)
+            return PadInfo(db.Polygon(box), center, length, width, 0.0, 'none')
+        key = (length, width, self.chamfer_size, chamfer_type)
+        proto = self._pad_cache.get(key)
+        if proto is None:
+            proto = draw_pad(
+                center=(0.0, 0.0),
+                length=length,
+                width=width,
+                chamfer_size=self.chamfer_size,
+                chamfer_type=chamfer_type
+            ).polygon
+            self._pad_cache[key] = proto
+        # 原点焊盘由draw_pad按GeometryUtils.UNIT_SCALE生成，平移量须用同一尺度换算
+        scale = GeometryUtils.UNIT_SCALE
+        trans = db.Trans(db.Vector(int(round(center[0] * scale)), int(round(center[1] * scale))))
+        return PadInfo(proto.transformed(trans), center, length, width, self.chamfer_size, chamfer_type)
+    
+    def _mirror_trans(self, x):
+        """返回关于竖直线 X=x (μm) 的镜像变换"""
+        return db.Trans(db.Trans.M90, db.Vector(int(round(2 * x * self._dbu_inv)), 0))
+    
+    def _centered_box(self, x, y, width, height):
+        """返回以 (x, y) 为中心的整数数据库单位矩形（输入单位μm）"""
+        cx, cy = x * self._dbu_inv, y * self._dbu_inv
+        w2, h2 = width * self._dbu_inv / 2, height * self._dbu_inv / 2
+        return db.Box(int(cx - w2), int(cy - h2), int(cx + w2), int(cy + h2))
+    
+    @staticmethod
+    def _scan_axis_values(param_range, count):
+        """
+        参数扫描中一个方向上各位置的参数值
+        
+        Args:
+            param_range: [min, max, steps] 或 [value]，None 表示不扫描该参数
+            count: 该方向上的器件数（行数或列数）
+            
+        Returns:
+            长度为 count 的参数值列表，param_range 为 None 时返回 None
+        """
+        if param_range is None:
+            return None
+        if len(param_range) != 3:
+            return [param_range[0]] * count
+        min_val, max_val, steps = param_range
+        return [min_val + i * (max_val - min_val) / (steps - 1) for i in range(count)]
+    
+    @staticmethod
+    def _insert_with_windows(shapes, outer_box, windows):
+        """
+        在outer_box矩形上开窗口并插入shapes
+        
+        窗口互不相交且严格位于outer_box内部时，直接构造带孔多边形；
+        否则退回Region布尔减法。
+        
+        Args:
+            shapes: 目标Shapes
+            outer_box: 外轮廓矩形 (db.Box)
+            windows: 窗口多边形列表
+        """
+        boxes = [window.bbox() for window in windows]
+        interior = all(
+            box.left > outer_box.left and box.right < outer_box.right and
+            box.bottom > outer_box.bottom and box.top < outer_box.top
+            for box in boxes
+        )
+        disjoint = all(
+            not boxes[i].overlaps(boxes[j]) and not boxes[i].touches(boxes[j])
+            for i in range(len(boxes)) for j in range(i + 1, len(boxes))
         )
-        cell.shapes(layer_id).insert(outer_pad2.polygon)
+        if interior and disjoint:
+            poly = db.Polygon(outer_box)
+            for window in windows:
+                poly.insert_hole(list(window.each_point_hull()))
+            shapes.insert(poly)
+            return
         
-        # 梯形扇出
-        fanout2 = draw_trapezoidal_fanout(inner_pad2, outer_pad2)
-        cell.shapes(layer_id).insert(fanout2)
+        region = Region(outer_box)
+        for window in windows:
+            region -= Region(window)
+        for poly in region.each():
+            shapes.insert(poly)
     
     def create_dielectric_layer(self, cell, x=0.0, y=0.0):
         """
@@ -181,19 +306,12 @@ class FET:
             cell: 目标单元格
             x, y: 器件中心坐标
         """
-        try:
-            import pya
-            Region = pya.Region
-        except Exception:
-            import klayout.db as db
-            Region = db.Region
-        layer_id = LAYER_DEFINITIONS['top_dielectric']['id']
+        layer_id = self._lid_top_dielectric
 
         # 1. 生成大矩形region，覆盖整个器件区域
         region_width = self.device_margin_x * 2
         region_height = self.device_margin_y * 2
-        dielectric_rect = GeometryUtils.create_rectangle_polygon(x, y, region_width, region_height, center=True)
-        dielectric_region = Region(dielectric_rect)
+        dielectric_box = self._centered_box(x, y, region_width, region_height)
 
         # 2. 生成source/drain outer pad窗口（略小于pad，带倒角）
         shrink_ratio = 0.85  # 窗口比pad略小
@@ -202,11 +320,12 @@ class FET:
         chamfer_size = self.chamfer_size * shrink_ratio if self.source_drain_outer_chamfer != 'none' else 0
         chamfer_type = self.source_drain_outer_chamfer
 
+        # source/drain outer pad中心相对器件中心的X偏移
+        outer_dx = self.ch_len/2 + self.source_drain_outer_offset_x
+        outer_y = y + self.source_drain_outer_offset_y
+
         # source outer pad中心
-        source_outer_center = (
-            x - self.ch_len/2 - self.source_drain_outer_offset_x,
-            y + self.source_drain_outer_offset_y
-        )
+        source_outer_center = (x - outer_dx, outer_y)
         source_window = draw_pad(
             center=source_outer_center,
             length=window_length,
@@ -216,10 +335,7 @@ class FET:
         ).polygon
 
         # drain outer pad中心
-        drain_outer_center = (
-            x + self.ch_len/2 + self.source_drain_outer_offset_x,
-            y + self.source_drain_outer_offset_y
-        )
+        drain_outer_center = (x + outer_dx, outer_y)
         drain_window = draw_pad(
             center=drain_outer_center,
             length=window_length,
@@ -228,12 +344,8 @@ class FET:
             chamfer_type=chamfer_type
         ).polygon
 
-        # 3. 用Region布尔减法开窗口
-        dielectric_region -= Region(source_window)
-        dielectric_region -= Region(drain_window)
-
-        # 4. 插入到cell
-        cell.shapes(layer_id).insert(dielectric_region)
+        # 3. 开窗口并插入到cell
+        self._insert_with_windows(cell.shapes(layer_id), dielectric_box, [source_window, drain_window])
     
     def create_dielectric_layer_top_gate_outer(self, cell, x=0.0, y=0.0):
         """
@@ -242,19 +354,12 @@ class FET:
             cell: 目标单元格
             x, y: 器件中心坐标
         """
-        try:
-            import pya
-            Region = pya.Region
-        except Exception:
-            import klayout.db as db
-            Region = db.Region
-        layer_id = LAYER_DEFINITIONS['top_dielectric']['id']
+        layer_id = self._lid_top_dielectric
 
         # 1. 生成大矩形region，覆盖整个器件区域
         region_width = self.device_margin_x * 2
         region_height = self.device_margin_y * 2
-        dielectric_rect = GeometryUtils.create_rectangle_polygon(x, y, region_width, region_height, center=True)
-        dielectric_region = Region(dielectric_rect)
+        dielectric_box = self._centered_box(x, y, region_width, region_height)
 
         # 2. 生成source/drain outer pad窗口（略小于pad，带倒角）
         shrink_ratio = 0.85  # 窗口比pad略小
@@ -277,11 +382,8 @@ class FET:
         ).polygon
 
 
-        # 3. 用Region布尔减法开窗口
-        dielectric_region -= Region(gate_window)
-
-        # 4. 插入到cell
-        cell.shapes(layer_id).insert(dielectric_region)
+        # 3. 开窗口并插入到cell
+        self._insert_with_windows(cell.shapes(layer_id), dielectric_box, [gate_window])
 
     def create_dielectric_layer_inner_window(self, cell, x=0.0, y=0.0):
         """
@@ -290,19 +392,12 @@ class FET:
             cell: 目标单元格
             x, y: 器件中心坐标
         """
-        try:
-            import pya
-            Region = pya.Region
-        except Exception:
-            import klayout.db as db
-            Region = db.Region
-        layer_id = LAYER_DEFINITIONS['top_dielectric']['id']
+        layer_id = self._lid_top_dielectric
 
         # 1. 生成大矩形region，覆盖整个器件区域
         region_width = self.device_margin_x * 2
         region_height = self.device_margin_y * 2
-        dielectric_rect = GeometryUtils.create_rectangle_polygon(x, y, region_width, region_height, center=True)
-        dielectric_region = Region(dielectric_rect)
+        dielectric_box = self._centered_box(x, y, region_width, region_height)
 
         # 2. 生成source/drain inner pad窗口（与源漏inner pad参数完全一致，仅略小）
         shrink_ratio = 0.95  # 窗口比inner pad略小
@@ -335,12 +430,8 @@ class FET:
             chamfer_type=chamfer_type
         ).polygon
 
-        # 3. 用Region布尔减法开窗口
-        dielectric_region -= Region(source_window)
-        dielectric_region -= Region(drain_window)
-
-        # 4. 插入到cell
-        cell.shapes(layer_id).insert(dielectric_region)
+        # 3. 开窗口并插入到cell
+        self._insert_with_windows(cell.shapes(layer_id), dielectric_box, [source_window, drain_window])
     
     def create_channel_material(self, cell, x=0.0, y=0.0):
         """
@@ -350,7 +441,7 @@ class FET:
             cell: 目标单元格
             x, y: 器件中心坐标
         """
-        layer_id = LAYER_DEFINITIONS['channel']['id']
+        layer_id = self._lid_channel
         
         # 沟道材料矩形
         channel = GeometryUtils.create_rectangle(
@@ -365,57 +456,35 @@ class FET:
         """
         创建源漏电极（含inner/outer pad和扇出）
         """
-        layer_id = LAYER_DEFINITIONS['source_drain']['id']
+        layer_id = self._lid_source_drain
 
         # 源极 inner pad
-        source_inner = draw_pad(
+        source_inner = self._electrode_pad(
             center=(x - self.ch_len, y),
             length=self.ch_len,
             width=self.ch_width * self.source_drain_inner_width_ratio,
-            chamfer_size=0 if self.source_drain_inner_chamfer == 'none' else self.chamfer_size,
             chamfer_type=self.source_drain_inner_chamfer
         )
-        cell.shapes(layer_id).insert(source_inner.polygon)
 
         # 源极 outer pad
-        source_outer = draw_pad(
+        source_outer = self._electrode_pad(
             center=(x - self.ch_len/2 - self.source_drain_outer_offset_x, 
                    y + self.source_drain_outer_offset_y),
             length=self.outer_pad_size,
             width=self.outer_pad_size,
-            chamfer_size=0 if self.source_drain_outer_chamfer == 'none' else self.chamfer_size,
             chamfer_type=self.source_drain_outer_chamfer
         )
-        cell.shapes(layer_id).insert(source_outer.polygon)
 
         # 源极扇出
         source_fanout = draw_trapezoidal_fanout(source_inner, source_outer)
-        cell.shapes(layer_id).insert(source_fanout)
 
-        # 漏极 inner pad
-        drain_inner = draw_pad(
-            center=(x + self.ch_len, y),
-            length=self.ch_len,
-            width=self.ch_width * self.source_drain_inner_width_ratio,
-            chamfer_size=0 if self.source_drain_inner_chamfer == 'none' else self.chamfer_size,
-            chamfer_type=self.source_drain_inner_chamfer
-        )
-        cell.shapes(layer_id).insert(drain_inner.polygon)
+        # 漏极：与源极关于器件中心竖直轴镜像
+        mirror = self._mirror_trans(x)
 
-        # 漏极 outer pad
-        drain_outer = draw_pad(
-            center=(x + self.ch_len/2 + self.source_drain_outer_offset_x, 
-                   y + self.source_drain_outer_offset_y),
-            length=self.outer_pad_size,
-            width=self.outer_pad_size,
-            chamfer_size=0 if self.source_drain_outer_chamfer == 'none' else self.chamfer_size,
-            chamfer_type=self.source_drain_outer_chamfer
-        )
-        cell.shapes(layer_id).insert(drain_outer.polygon)
-
-        # 漏极扇出
-        drain_fanout = draw_trapezoidal_fanout(drain_inner, drain_outer)
-        cell.shapes(layer_id).insert(drain_fanout)
+        # 一次性插入所有多边形
+        polys = [source_inner.polygon, source_outer.polygon, source_fanout]
+        polys += [poly.transformed(mirror) for poly in polys]
+        cell.shapes(layer_id).insert(Region(polys))
     
     def create_top_gate_electrode(self, cell, x=0.0, y=0.0):
         """
@@ -425,31 +494,35 @@ class FET:
             cell: 目标单元格
             x, y: 器件中心坐标
         """
-        layer_id = LAYER_DEFINITIONS['top_gate']['id']
+        layer_id = self._lid_top_gate
         
         # Inner pad
-        inner_pad = draw_pad(
+        inner_pad = self._electrode_pad(
             center=(x, y),
             length=self.ch_len * self.top_gate_inner_width_ratio,
             width=self.ch_width * self.bottom_gate_inner_width_ratio,  # 使用与底栅相同的宽度比例
-            chamfer_size=0 if self.top_gate_inner_chamfer == 'none' else self.chamfer_size,
             chamfer_type=self.top_gate_inner_chamfer
         )
-        cell.shapes(layer_id).insert(inner_pad.polygon)
         
         # Outer pad
-        outer_pad = draw_pad(
+        outer_pad = self._electrode_pad(
             center=(x + self.top_gate_outer_offset_x, y + self.top_gate_outer_offset_y),
             length=self.outer_pad_size,
             width=self.outer_pad_size,
-            chamfer_size=0 if self.top_gate_outer_chamfer == 'none' else self.chamfer_size,
             chamfer_type=self.top_gate_outer_chamfer
         )
-        cell.shapes(layer_id).insert(outer_pad.polygon)
         
         # 梯形扇出
         fanout = draw_trapezoidal_fanout(inner_pad, outer_pad)
-        cell.shapes(layer_id).insert(fanout)
+        
+        # 一次性插入所有多边形
+        cell.shapes(layer_id).insert(Region([inner_pad.polygon, outer_pad.polygon, fanout]))
+    
+    def _mark_offsets(self):
+        """四个角落标记中心相对器件中心的偏移，按当前边界参数计算"""
+        half_x = self.device_margin_x - self.mark_margin
+        half_y = self.device_margin_y - self.mark_margin
+        return [(sx * half_x, sy * half_y) for sx, sy in self._MARK_CORNER_SIGNS]
     
     def create_alignment_marks(self, cell, x=0.0, y=0.0, device_id=None, row=None, col=None, label_type=None):
         """
@@ -463,90 +536,85 @@ class FET:
             col: 列号（用于生成字母+数字格式的标记）
             label_type: 标签类型，'textutils' 或 'digital'
         """
-        layer_id = LAYER_DEFINITIONS['alignment_marks']['id']
-        
-        # 计算器件边界
-        device_width = self.device_margin_x * 2
-        device_height = self.device_margin_y * 2
-        
-        # 四个角落的标记位置
-        mark_positions = [
-            (x - device_width/2 + self.mark_margin, y + device_height/2 - self.mark_margin),  # 左上
-            (x + device_width/2 - self.mark_margin, y + device_height/2 - self.mark_margin),  # 右上
-            (x - device_width/2 + self.mark_margin, y - device_height/2 + self.mark_margin),  # 左下
-            (x + device_width/2 - self.mark_margin, y - device_height/2 + self.mark_margin)   # 右下
-        ]
+        layer_id = self._lid_alignment
+        layer_shapes = cell.shapes(layer_id)
         
         # 创建标记
-        for i, (mark_x, mark_y) in enumerate(mark_positions):
-            mark_type = self.mark_types[i] if i < len(self.mark_types) else 'cross'
+        n_types = len(self.mark_types)
+        n_rotations = len(self.mark_rotations)
+        for i, (offset_x, offset_y) in enumerate(self._mark_offsets()):
+            mark_x = x + offset_x
+            mark_y = y + offset_y
+            mark_type = self.mark_types[i] if i < n_types else 'cross'
             
-            # 根据MarkUtils中的函数名创建对应的标记
-            if mark_type == 'cross':
-                marks = MarkUtils.cross(mark_x, mark_y, self.mark_size, self.mark_width)
-            elif mark_type == 'square':
-                marks = MarkUtils.square(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'circle':
-                marks = MarkUtils.circle(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'diamond':
-                marks = MarkUtils.diamond(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'triangle':
-                marks = MarkUtils.triangle(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'l':
-                marks = MarkUtils.l(mark_x, mark_y, self.mark_size, self.mark_width)
-            elif mark_type == 't':
-                marks = MarkUtils.t(mark_x, mark_y, self.mark_size, self.mark_width)
-            elif mark_type == 'semi_cross':
-                marks = MarkUtils.semi_cross(mark_x, mark_y, self.mark_size, self.mark_width)
-            elif mark_type == 'cross_pos':
-                marks = MarkUtils.cross_pos(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'cross_neg':
-                marks = MarkUtils.cross_neg(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'l_shape':
-                marks = MarkUtils.l_shape(mark_x, mark_y, self.mark_size)
-            elif mark_type == 't_shape':
-                marks = MarkUtils.t_shape(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'sq_missing':
-                marks = MarkUtils.sq_missing(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'sq_missing_border':
-                marks = MarkUtils.sq_missing_border(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'cross_tri':
-                marks = MarkUtils.cross_tri(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'regular_polygon':
-                marks = MarkUtils.regular_polygon(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'chamfered_octagon':
-                marks = MarkUtils.chamfered_octagon(mark_x, mark_y, self.mark_size)
+            # 根据MarkUtils中的函数名创建对应的标记，未知类型默认使用十字标记
+            mark_func, needs_width = self._MARK_TABLE.get(mark_type, self._MARK_TABLE['cross'])
+            if needs_width:
+                marks = mark_func(mark_x, mark_y, self.mark_size, self.mark_width)
             else:
-                # 默认使用十字标记
-                marks = MarkUtils.cross(mark_x, mark_y, self.mark_size, self.mark_width)
+                marks = mark_func(mark_x, mark_y, self.mark_size)
             
             # 根据mark_rotations参数旋转标记
-            rotation_angle = self.mark_rotations[i] if i < len(self.mark_rotations) else 0
-            if rotation_angle > 0:
+            rotation_angle = self.mark_rotations[i] if i < n_rotations else 0
+            if rotation_angle:
                 marks = marks.rotate(rotation_angle)  # 直接使用0,1,2,3作为旋转参数
             
             # 插入标记
             shapes = marks.get_shapes()
             if isinstance(shapes, list):
                 for shape in shapes:
-                    cell.shapes(layer_id).insert(shape)
+                    layer_shapes.insert(shape)
             else:
-                cell.shapes(layer_id).insert(shapes)
+                layer_shapes.insert(shapes)
         
         # 在右上角cross mark的右下角添加数字编号
         if device_id is not None:
-            # 计算数字标记位置（右上角cross mark的右下角）
-            mark_x, mark_y = mark_positions[0]  # 右上角位置
-            # 向右下偏移，避开cross mark
-            label_x = mark_x + self.mark_size * 0.8
-            label_y = mark_y - self.mark_size * 0.8
-            
-            # 如果有行列信息，使用字母+数字格式；否则使用纯数字
-            if row is not None and col is not None:
-                self.create_device_label(cell, label_x, label_y, row, col, label_type)
-            else:
-                # 将 device_id 转换为字符串，作为纯数字标记
-                self.create_device_label(cell, label_x, label_y, device_id - 1, 0, label_type)  # 假设为第0列
+            self._place_device_label(cell, x, y, device_id, row, col, label_type)
+    
+    def _place_device_label(self, cell, x, y, device_id, row=None, col=None, label_type=None):
+        """按器件编号放置编号标签：有行列信息时用字母+数字格式，否则按编号排在第0列"""
+        if row is not None and col is not None:
+            self._place_label_only(cell, x, y, row, col, label_type)
+        else:
+            # 将 device_id 转换为字符串，作为纯数字标记
+            self._place_label_only(cell, x, y, device_id - 1, 0, label_type)  # 假设为第0列
+    
+    def _marks_cell(self):
+        """
+        对准标记单元格：标记只取决于标记设置与器件边界，与器件参数无关，
+        因此在原点生成一次，各器件以实例平移引用
+        """
+        # mark_types/mark_rotations是公开属性，构造后可能被赋值为列表，转为元组再作键
+        key = (
+            tuple(self.mark_types), tuple(self.mark_rotations), self.mark_size, self.mark_width,
+            self.device_margin_x, self.device_margin_y, self.mark_margin
+        )
+        cell = self._marks_cells.get(key)
+        if cell is None:
+            cell = self.layout.create_cell("FET_Alignment_Marks")
+            self.create_alignment_marks(cell, 0.0, 0.0)
+            self._marks_cells[key] = cell
+        return cell
+    
+    def _place_label_only(self, cell, x, y, row, col, label_type=None):
+        """
+        只在器件的编号位置放置标签（不生成其他几何）
+        
+        Args:
+            cell: 目标单元格
+            x, y: 器件中心坐标
+            row: 行号
+            col: 列号
+            label_type: 标签类型，'textutils' 或 'digital'
+        """
+        # 计算数字标记位置（左上角mark的右下角）
+        offset_x, offset_y = self._mark_offsets()[0]
+        mark_x = x + offset_x
+        mark_y = y + offset_y
+        # 向右下偏移，避开mark
+        label_x = mark_x + self.mark_size * 0.8
+        label_y = mark_y - self.mark_size * 0.8
+        self.create_device_label(cell, label_x, label_y, row, col, label_type)
     
     def create_device_label(self, cell, x, y, row, col, label_type=None):
         """
@@ -575,7 +643,8 @@ class FET:
         """
         使用TextUtils创建器件标签（推荐方式）
         """
-        layer_id = LAYER_DEFINITIONS['labels']['id']
+        layer_id = self._lid_labels
+        layer_shapes = cell.shapes(layer_id)
         
         # 生成字母+数字格式的标记
         col_letter = chr(ord('A') + col)  # 0->A, 1->B, 2->C, ...
@@ -595,22 +664,28 @@ class FET:
             char_x = label_x + i * char_spacing
             char_y = label_y
             
-            # 使用 TextUtils 创建文本
-            text_shapes = TextUtils.create_text_freetype(
-                char, char_x, char_y, 
-                size_um=int(char_size), 
-                font_path=self.label_font,
-                spacing_um=0.5
-            )
+            # 使用 TextUtils 创建文本（同一字符只栅格化一次）
+            key = (char, int(char_size), self.label_font)
+            text_shapes = self._glyph_cache.get(key)
+            if text_shapes is None:
+                text_shapes = TextUtils.create_text_freetype(
+                    char, 0.0, 0.0, 
+                    size_um=int(char_size), 
+                    font_path=self.label_font,
+                    spacing_um=0.5
+                )
+                self._glyph_cache[key] = text_shapes
             
+            trans = db.Trans(db.Vector(int(round(char_x * self._dbu_inv)), int(round(char_y * self._dbu_inv))))
             for shape in text_shapes:
-                cell.shapes(layer_id).insert(shape)
+                layer_shapes.insert(shape.transformed(trans))
     
     def _create_device_label_digital(self, cell, x, y, row, col):
         """
         使用DigitalDisplay创建器件标签（传统方式）
         """
-        layer_id = LAYER_DEFINITIONS['labels']['id']
+        layer_id = self._lid_labels
+        layer_shapes = cell.shapes(layer_id)
         
         # 生成字母+数字格式的标记
         col_letter = chr(ord('A') + col)  # 0->A, 1->B, 2->C, ...
@@ -631,15 +706,20 @@ class FET:
             char_x = label_x + i * char_spacing
             char_y = label_y
             
-            # 使用 DigitalDisplay 创建数字显示
-            polygons = DigitalDisplay.create_digit(
-                char, char_x, char_y, 
-                size=char_size, 
-                stroke_width=stroke_width
-            )
+            # 使用 DigitalDisplay 创建数字显示（同一字符只生成一次）
+            key = (char, char_size, stroke_width)
+            polygons = self._digit_cache.get(key)
+            if polygons is None:
+                polygons = DigitalDisplay.create_digit(
+                    char, 0.0, 0.0, 
+                    size=char_size, 
+                    stroke_width=stroke_width
+                )
+                self._digit_cache[key] = polygons
             
+            trans = db.Trans(db.Vector(int(round(char_x * self._dbu_inv)), int(round(char_y * self._dbu_inv))))
             for polygon in polygons:
-                cell.shapes(layer_id).insert(polygon)
+                layer_shapes.insert(polygon.transformed(trans))
     
     def create_parameter_labels(self, cell, x, y, device_params):
         """
@@ -650,7 +730,7 @@ class FET:
             x, y: 器件中心坐标
             device_params: 器件参数字典
         """
-        layer_id = LAYER_DEFINITIONS['labels']['id']
+        layer_id = self._lid_labels
         
         # 计算标注起始位置（器件中心上方）
         start_x = x - self.device_margin_x * 0.9  # 向左偏移
@@ -679,19 +759,17 @@ class FET:
             gate_width = device_params['gate_width']
             param_texts.append(f"GW:{gate_width:.1f}")
         
-        # 创建每行参数标注
+        # 创建每行参数标注（转换为数据库单位，与几何使用同一缩放）
         line_spacing = 10.0  # 行间距 (μm)
-        for i, text in enumerate(param_texts):
-            text_y = start_y - i * line_spacing
-            
-            # 使用db.Text创建文本
-            text_obj = db.Text(
-                text,
-                int(start_x * 1000),  # 转换为数据库单位
-                int(text_y * 1000)    # 转换为数据库单位
-            )
-            
-            cell.shapes(layer_id).insert(text_obj)
+        text_x = int(start_x * self._dbu_inv)
+        text_objs = [
+            db.Text(text, text_x, int((start_y - i * line_spacing) * self._dbu_inv))
+            for i, text in enumerate(param_texts)
+        ]
+        
+        layer_shapes = cell.shapes(layer_id)
+        for text_obj in text_objs:
+            layer_shapes.insert(text_obj)
     
     def create_single_device(self, cell_name="FET_Device", x=0, y=0, device_id=None, row=None, col=None, device_params=None, label_type=None):
         """
@@ -711,11 +789,27 @@ class FET:
         """
         cell = self.layout.create_cell(cell_name)
         
-        # 确保坐标是浮点数
-        x = float(x)
-        y = float(y)
+        # 在接口处一次性对齐到数据库网格，下游换算不再引入舍入误差
+        x = int(round(x * self._dbu_inv)) / self._dbu_inv
+        y = int(round(y * self._dbu_inv)) / self._dbu_inv
+        
+        # 按层次顺序创建器件结构；对准标记引用共享的标记单元格
+        self._create_device_geometry(cell, x, y)
+        cell.insert(db.CellInstArray(
+            self._marks_cell().cell_index(),
+            db.Trans(db.Vector(int(round(x * self._dbu_inv)), int(round(y * self._dbu_inv))))
+        ))
+        if device_id is not None:
+            self._place_device_label(cell, x, y, device_id, row, col, label_type)
         
-        # 按层次顺序创建器件结构
+        # 如果有器件参数，添加参数标注
+        if device_params:
+            self.create_parameter_labels(cell, x, y, device_params)
+        
+        return cell
+    
+    def _create_device_geometry(self, cell, x, y):
+        """按层次顺序创建与编号无关的器件结构（电极、介质、沟道）"""
         self.create_bottom_gate_electrodes(cell, x, y)
         # self.create_dielectric_layer(cell, x, y)
         self.create_dielectric_layer_top_gate_outer(cell, x, y)
@@ -723,12 +817,20 @@ class FET:
         self.create_channel_material(cell, x, y)
         self.create_source_drain_electrodes(cell, x, y)
         self.create_top_gate_electrode(cell, x, y)
-        self.create_alignment_marks(cell, x, y, device_id, row, col, label_type)
-        
-        # 如果有器件参数，添加参数标注
-        if device_params:
-            self.create_parameter_labels(cell, x, y, device_params)
+    
+    def _build_device_template(self, cell_name="FET_Template"):
+        """
+        创建器件模板单元格：所有与位置、编号无关的几何（含对准标记）都放在原点
         
+        Args:
+            cell_name: 模板单元格名称
+            
+        Returns:
+            模板单元格
+        """
+        cell = self.layout.create_cell(cell_name)
+        self._create_device_geometry(cell, 0.0, 0.0)
+        self.create_alignment_marks(cell, 0.0, 0.0)
         return cell
     
     def create_device_array(self, rows=10, cols=10, device_spacing_x=None, device_spacing_y=None, label_type=None):
@@ -754,26 +856,33 @@ class FET:
         # 创建阵列单元格
         array_cell = self.layout.create_cell("FET_Array")
         
-        # 创建器件阵列
+        # 所有器件共享同一个模板单元格，以规则阵列实例一次性放置
+        template_cell = self._build_device_template()
+        step_x = int(round(device_spacing_x * self._dbu_inv))
+        step_y = int(round(device_spacing_y * self._dbu_inv))
+        array_cell.insert(db.CellInstArray(
+            template_cell.cell_index(),
+            db.Trans(),
+            db.Vector(step_x, 0),
+            db.Vector(0, step_y),
+            cols, rows
+        ))
+        
+        # 编号随位置变化，每个位置单独生成一个只含编号的单元格
         device_id = 1
         for row in range(rows):
             for col in range(cols):
-                # 计算器件位置
-                device_x = int(col * device_spacing_x)
-                device_y = int(row * device_spacing_y)
+                # 计算器件位置（与阵列实例的格点一致）
+                device_x = col * step_x / self._dbu_inv
+                device_y = row * step_y / self._dbu_inv
                 
-                # 创建单个器件
-                device_cell = self.create_single_device(
-                    f"FET_{device_id:03d}", 
-                    device_x, device_y, 
-                    device_id, row, col,
-                    label_type=label_type
-                )
+                label_cell = self.layout.create_cell(f"FET_{device_id:03d}_Label")
+                self._place_label_only(label_cell, device_x, device_y, row, col, label_type)
                 
-                # 将器件单元格插入到阵列中
+                # 将编号单元格插入到阵列中
                 array_cell.insert(db.CellInstArray(
-                    device_cell.cell_index(),
-                    db.Trans(0, 0)
+                    label_cell.cell_index(),
+                    self._IDENTITY_TRANS
                 ))
                 
                 device_id += 1
@@ -802,63 +911,53 @@ class FET:
         total_devices = rows * cols
         device_id = 1
         
-        # 计算参数步长
-        param_steps = {}
-        for param_name, param_range in param_ranges.items():
-            if len(param_range) == 3:
-                min_val, max_val, steps = param_range
-                param_steps[param_name] = (max_val - min_val) / (steps - 1) if steps > 1 else 0
-            else:
-                param_steps[param_name] = 0
+        # 预先计算每行/每列的参数值：行扫描沟道宽度，列扫描沟道长度
+        ch_widths = self._scan_axis_values(param_ranges.get('ch_width'), rows)
+        ch_lens = self._scan_axis_values(param_ranges.get('ch_len'), cols)
+        gate_widths = None if ch_lens is None else [(ch_len - 5.0) / 2 for ch_len in ch_lens]
         
         # 计算器件间距
         device_spacing_x = self.device_margin_x * 2 + 50
         device_spacing_y = self.device_margin_y * 2 + 50
         
+        # 各列/各行器件中心坐标（加上偏移）
+        xs = [int(offset_x + col * device_spacing_x) for col in range(cols)]
+        ys = [int(offset_y + row * device_spacing_y) for row in range(rows)]
+        
+        # 某一方向参数不变时，整列（或整行）器件几何相同，改用模板+规则阵列实例
+        widths_fixed = ch_widths is None or len(set(ch_widths)) <= 1
+        lens_fixed = ch_lens is None or len(set(ch_lens)) <= 1
+        if (widths_fixed or lens_fixed) and self._is_regular(xs) and self._is_regular(ys):
+            self._fill_scan_batched(scan_cell, xs, ys, ch_widths, ch_lens, gate_widths, label_type)
+            return scan_cell
+        
+        # 器件单元格名称一次性生成
+        names = [f"FET_Scan_{i:03d}" for i in range(1, total_devices + 1)]
+        
         # 创建器件阵列
         for row in range(rows):
             for col in range(cols):
                 # 计算当前器件的参数值
                 current_params = {}
-                
-                # 行扫描：沟道宽度
-                if 'ch_width' in param_ranges:
-                    ch_width_range = param_ranges['ch_width']
-                    if len(ch_width_range) == 3:
-                        min_val, max_val, steps = ch_width_range
-                        ch_width = min_val + row * (max_val - min_val) / (steps - 1)
-                        current_params['ch_width'] = ch_width
-                    else:
-                        current_params['ch_width'] = ch_width_range[0]
-                
-                # 列扫描：沟道长度
-                if 'ch_len' in param_ranges:
-                    ch_len_range = param_ranges['ch_len']
-                    if len(ch_len_range) == 3:
-                        min_val, max_val, steps = ch_len_range
-                        ch_len = min_val + col * (max_val - min_val) / (steps - 1)
-                        current_params['ch_len'] = ch_len
-                    else:
-                        current_params['ch_len'] = ch_len_range[0]
+                if ch_widths is not None:
+                    current_params['ch_width'] = ch_widths[row]
+                if ch_lens is not None:
+                    current_params['ch_len'] = ch_lens[col]
                 
                 # gate_space 使用全局设置的值
                 current_params['gate_space'] = self.gate_space
                 
-                # gate_width 为 (ch_len - 2μm) / 2
-                if 'ch_len' in current_params:
-                    current_params['gate_width'] = (current_params['ch_len'] - 5.0) / 2
+                # gate_width 为 (ch_len - 5μm) / 2
+                if gate_widths is not None:
+                    current_params['gate_width'] = gate_widths[col]
                 
                 # 设置当前器件的参数
                 self.set_device_parameters(**current_params)
                 
-                # 计算器件位置（加上偏移）
-                device_x = int(offset_x + col * device_spacing_x)
-                device_y = int(offset_y + row * device_spacing_y)
-                
-                # 创建单个器件
+                # 创建单个器件（位置已含偏移）
                 device_cell = self.create_single_device(
-                    f"FET_Scan_{device_id:03d}", 
-                    device_x, device_y, 
+                    names[device_id - 1], 
+                    xs[col], ys[row], 
                     device_id, row, col,
                     current_params,
                     label_type=label_type
@@ -867,12 +966,74 @@ class FET:
                 # 将器件单元格插入到扫描阵列中
                 scan_cell.insert(db.CellInstArray(
                     device_cell.cell_index(),
-                    db.Trans(0, 0)
+                    self._IDENTITY_TRANS
                 ))
                 
                 device_id += 1
         
         return scan_cell
+    
+    @staticmethod
+    def _is_regular(coords):
+        """坐标序列是否等间距（可用规则阵列实例表示）"""
+        return all(b - a == coords[1] - coords[0] for a, b in zip(coords, coords[1:]))
+    
+    def _fill_scan_batched(self, scan_cell, xs, ys, ch_widths, ch_lens, gate_widths, label_type=None):
+        """
+        参数扫描阵列的批量填充：每种参数组合只生成一个模板单元格，
+        沿不变参数方向以规则阵列实例一次性放置；编号随位置变化，单独成单元格
+        
+        Args:
+            scan_cell: 扫描阵列单元格
+            xs, ys: 各列/各行器件中心坐标 (μm，等间距)
+            ch_widths, ch_lens, gate_widths: 各行/各列参数值（None 表示不扫描）
+            label_type: 标签类型，'textutils' 或 'digital'
+        """
+        rows, cols = len(ys), len(xs)
+        step_x = (xs[1] - xs[0]) * self._dbu_inv if cols > 1 else 0
+        step_y = (ys[1] - ys[0]) * self._dbu_inv if rows > 1 else 0
+        
+        # 分组：(起始行, 起始列, 列数, 行数)；沟道宽度各行相同则按列分组，否则按行分组
+        widths_fixed = ch_widths is None or len(set(ch_widths)) <= 1
+        lens_fixed = ch_lens is None or len(set(ch_lens)) <= 1
+        if widths_fixed and lens_fixed:
+            groups = [(0, 0, cols, rows)]
+        elif widths_fixed:
+            groups = [(0, col, 1, rows) for col in range(cols)]
+        else:
+            groups = [(row, 0, cols, 1) for row in range(rows)]
+        
+        for k, (row, col, n_cols, n_rows) in enumerate(groups):
+            current_params = {}
+            if ch_widths is not None:
+                current_params['ch_width'] = ch_widths[row]
+            if ch_lens is not None:
+                current_params['ch_len'] = ch_lens[col]
+            current_params['gate_space'] = self.gate_space
+            if gate_widths is not None:
+                current_params['gate_width'] = gate_widths[col]
+            self.set_device_parameters(**current_params)
+            
+            template_cell = self._build_device_template(f"FET_Scan_Template_{k + 1:03d}")
+            self.create_parameter_labels(template_cell, 0.0, 0.0, current_params)
+            scan_cell.insert(db.CellInstArray(
+                template_cell.cell_index(),
+                db.Trans(db.Vector(xs[col] * self._dbu_inv, ys[row] * self._dbu_inv)),
+                db.Vector(step_x, 0),
+                db.Vector(0, step_y),
+                n_cols, n_rows
+            ))
+        
+        device_id = 1
+        for row in range(rows):
+            for col in range(cols):
+                label_cell = self.layout.create_cell(f"FET_Scan_{device_id:03d}_Label")
+                self._place_label_only(label_cell, xs[col], ys[row], row, col, label_type)
+                scan_cell.insert(db.CellInstArray(
+                    label_cell.cell_index(),
+                    self._IDENTITY_TRANS
+                ))
+                device_id += 1
 
 
 def main():
@@ -18,6 +18,9 @@ Usage:
 
 from __future__ import annotations
 
+from types import MappingProxyType
+from typing import Mapping
+
 import gdsfactory as gf
 
 try:
@@ -84,18 +87,26 @@ class GenericNanoDeviceLayerMap(LayerMap):
 
 LAYER = GenericNanoDeviceLayerMap
 
-# Layer name -> (gdslayer, gdspurpose) for resolving GDS layer from LayerMap enum (enum .value may be int)
-LAYER_TUPLES = {
-    "MECHANICAL": (1, 0), "ACTIVE": (2, 0), "MARK": (3, 0), "MARK_FRAME": (4, 0), "CALIPER": (5, 0),
-    "L6": (6, 0), "L7": (7, 0), "L8": (8, 0), "L9": (9, 0),
-    "FE_BOTTOM_GATE": (10, 0), "FE_BOTTOM_DIELEC": (11, 0), "FE_N1_CHANNEL": (12, 0), "FE_N2_CHANNEL": (13, 0),
-    "FE_P1_CHANNEL": (14, 0), "FE_P2_CHANNEL": (15, 0), "FE_MID_DIELEC": (16, 0), "FE_MID_GATE": (17, 0),
-    "FE_TOP_DIELEC": (18, 0), "FE_TOP_GATE": (19, 0),
-    "BE_N_CONTACT": (20, 0), "BE_P_CONTACT": (21, 0), "BE_M1": (22, 0), "BE_SPACER1": (23, 0),
-    "BE_M2": (24, 0), "BE_SPACER2": (25, 0), "BE_M3": (26, 0), "BE_SPACER3": (27, 0),
-    "BE_M4": (28, 0), "BE_SPACER4": (29, 0),
-    "ALIGN_LINESCAN": (61, 0), "ALIGN_IMGSCAN": (62, 0), "ALIGN_MANUAL": (63, 0),
-}
+def _layer_tuple(name: str) -> tuple[int, int]:
+    """
+    (gdslayer, gdspurpose) of a layer map entry, independent of the LayerMap flavour:
+    plain tuple (no LayerMap), pydantic field default, or enum member with .layer/.datatype
+    (enum .value may be an int ordinal, not the actual layer number).
+    """
+    fields = getattr(GenericNanoDeviceLayerMap, "model_fields", None)
+    if fields and name in fields:
+        value = fields[name].default
+    else:
+        value = getattr(GenericNanoDeviceLayerMap, name)
+    if isinstance(value, tuple):
+        return (int(value[0]), int(value[1]))
+    return (int(value.layer), int(value.datatype))
+
+
+# Layer name -> (gdslayer, gdspurpose), built once from the layer map (read-only)
+LAYER_TUPLES: Mapping[str, tuple[int, int]] = MappingProxyType(
+    {name: _layer_tuple(name) for name in GenericNanoDeviceLayerMap.__annotations__}
+)
 
 
 # Register PDK: gdsfactory 6.x 需要 layers 为 dict
@@ -107,10 +118,10 @@ except Exception:
 
 
 def activate() -> None:
-    """Activate nanodevice PDK so gf.get_layer(name) etc. use this PDK's layers."""
+    """
+    Activate nanodevice PDK so gf.get_layer(name) etc. use this PDK's layers.
+    Not done on import: modules that build gdsfactory components with LAYER
+    defaults call it once themselves (see mark_writefield_gdsfactory).
+    """
     if PDK is not None:
         PDK.activate()
-
-
-# Auto-activate on import so mark_writefield_gdsfactory etc. can use LAYER defaults
-activate()
@@ -9,7 +9,9 @@ Can use PyQtGraph (fast) or Matplotlib (fallback/save).
 from __future__ import annotations
 
 import argparse
-import re
+import importlib.util
+import mmap
+import os
 import sys
 from dataclasses import dataclass
 from pathlib import Path
@@ -21,35 +23,62 @@ try:
 except ImportError:
     np = None
 
-try:
-    import pyqtgraph as pg
-    from pyqtgraph.Qt import QtWidgets
-    HAS_PYQTGRAPH = True
-except ImportError:
-    HAS_PYQTGRAPH = False
+# GUI backends are only located here and imported on first use (see _load_*),
+# so startup does not pay for a backend that is never shown
+HAS_PYQTGRAPH = importlib.util.find_spec("pyqtgraph") is not None
+pg = None
+QtWidgets = None
 
 # Fallback backend
-try:
-    import matplotlib.pyplot as plt
-except ImportError:
-    plt = None
+plt = None
+
+tk = None
+filedialog = None
 
-try:
-    import tkinter as tk
-    from tkinter import filedialog
-except ImportError:
-    tk = None
-    filedialog = None
 
+def _load_pyqtgraph() -> bool:
+    global pg, QtWidgets
+    if pg is None:
+        try:
+            import pyqtgraph as _pg
+            from pyqtgraph.Qt import QtWidgets as _QtWidgets
+        except ImportError:
+            return False
+        pg, QtWidgets = _pg, _QtWidgets
+    return True
 
-@dataclass
+
+def _load_matplotlib() -> bool:
+    global plt
+    if plt is None:
+        try:
+            import matplotlib.pyplot as _plt
+        except ImportError:
+            return False
+        plt = _plt
+    return True
+
+
+def _load_tk() -> bool:
+    global tk, filedialog
+    if tk is None:
+        try:
+            import tkinter as _tk
+            from tkinter import filedialog as _filedialog
+        except ImportError:
+            return False
+        tk, filedialog = _tk, _filedialog
+    return True
+
+
+@dataclass(slots=True)
 class Poly:
     dose: float
     meta: str
-    pts: List[Tuple[float, float]]
+    pts: "np.ndarray | List[Tuple[float, float]]"  # (N, 2) array when NumPy is available
 
 
-@dataclass
+@dataclass(slots=True)
 class Seg:
     dose: float
     meta: str
@@ -57,11 +86,38 @@ class Seg:
     p2: Tuple[float, float]
 
 
-_num_re = re.compile(r"^[+-]?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?$")
+@dataclass(slots=True)
+class SegArray:
+    """
+    Line segments as arrays (structure of arrays, NumPy only).
+    p1, p2: (N, 2) endpoints, dose: (N,), meta: one header string per segment.
+    """
+    dose: "np.ndarray"
+    meta: List[str]
+    p1: "np.ndarray"
+    p2: "np.ndarray"
+
+    def __len__(self) -> int:
+        return len(self.meta)
+
+    def __getitem__(self, idx: slice) -> "SegArray":
+        return SegArray(dose=self.dose[idx], meta=self.meta[idx], p1=self.p1[idx], p2=self.p2[idx])
 
+    @classmethod
+    def from_segs(cls, segs: List[Seg]) -> "SegArray":
+        return cls(
+            dose=np.array([s.dose for s in segs], dtype=np.float64),
+            meta=[s.meta for s in segs],
+            p1=np.array([s.p1 for s in segs], dtype=np.float64).reshape(-1, 2),
+            p2=np.array([s.p2 for s in segs], dtype=np.float64).reshape(-1, 2),
+        )
 
-def _is_float_token(s: str) -> bool:
-    return bool(_num_re.match(s))
+
+def _to_float(s: str) -> Optional[float]:
+    try:
+        return float(s)
+    except ValueError:
+        return None
 
 
 def _parse_header(line: str) -> Tuple[str, List[str]]:
@@ -77,101 +133,341 @@ def _parse_header(line: str) -> Tuple[str, List[str]]:
     if tokens[0].upper() == "L":
         return "L", tokens
     # polygon blocks often start with an integer like "1"
-    if _is_float_token(tokens[0]) and tokens[0].lstrip("+-").isdigit():
+    if tokens[0].lstrip("+-").isdigit():
         return "POLY", tokens
 
     return "UNKNOWN", tokens
 
 
-def parse_asc(path: Path) -> Tuple[List[Poly], List[Seg]]:
+def _header_dose(tokens: List[str]) -> float:
+    dose = _to_float(tokens[1]) if len(tokens) >= 2 else None
+    return float("nan") if dose is None else dose
+
+
+def _find_block_end(text: str, pos: int) -> Tuple[int, int]:
+    """
+    Find the '#' terminator line at or after ``pos``.
+    Returns (block_end, next_pos): the start of the terminator line and the
+    position just past it. Without a terminator both are ``len(text)``.
+    """
+    n = len(text)
+    hash_pos = text.find("#", pos)
+    while hash_pos >= 0:
+        line_start = max(text.rfind("\n", pos, hash_pos) + 1, pos)
+        if not text[line_start:hash_pos].strip():
+            line_end = text.find("\n", hash_pos)
+            return line_start, (n if line_end < 0 else line_end + 1)
+        hash_pos = text.find("#", hash_pos + 1)
+    return n, n
+
+
+def _parse_points_slow(block: str) -> List[Tuple[float, float]]:
+    pts: List[Tuple[float, float]] = []
+    for raw in block.splitlines():
+        xy = raw.split()
+        if len(xy) >= 2:
+            x, y = _to_float(xy[0]), _to_float(xy[1])
+            if x is not None and y is not None:
+                pts.append((x, y))
+    return pts
+
+
+def _parse_points(block: str):
+    """
+    Parse a coordinate block (one "x y" pair per line).
+    Uses a single NumPy conversion when every line is a clean pair,
+    otherwise falls back to the tolerant per-line parser.
+    """
+    if np is None:
+        return _parse_points_slow(block)
+
+    # The flat token list only pairs up correctly when every non-empty line
+    # holds exactly two tokens; a matching total alone (1 + 3 tokens) is not enough
+    rows = [raw.split() for raw in block.splitlines()]
+    if all(len(xy) == 2 for xy in rows if xy):
+        try:
+            return np.array(block.split(), dtype=np.float64).reshape(-1, 2)
+        except ValueError:
+            return np.array(_parse_points_slow(block), dtype=np.float64).reshape(-1, 2)
+
+    # Short or extra columns: keep the first two tokens of lines with >= 2 tokens,
+    # still one conversion
+    xy_tokens: List[str] = []
+    for xy in rows:
+        if len(xy) >= 2:
+            xy_tokens += xy[:2]
+    try:
+        return np.array(xy_tokens, dtype=np.float64).reshape(-1, 2)
+    except ValueError:
+        return np.array(_parse_points_slow(block), dtype=np.float64).reshape(-1, 2)
+
+
+def _parse_asc_text(text: str, max_polys: int = 0, max_segs: int = 0) -> Tuple[List[Poly], List[Seg]]:
+    """
+    Line-by-line parser (used without NumPy or for irregular files).
+    Stops early once both max_polys and max_segs (if given) are reached.
+    """
     polys: List[Poly] = []
     segs: List[Seg] = []
 
-    lines = path.read_text(encoding="utf-8", errors="ignore").splitlines()
+    n = len(text)
 
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
+    pos = 0
+    while pos < n:
+        line_end = text.find("\n", pos)
+        if line_end < 0:
+            line_end = n
+        line = text[pos:line_end].strip()
+        pos = line_end + 1
 
         # skip empty lines
         if not line:
-            i += 1
             continue
 
         # allow comment-style lines if they exist
         if line.startswith(("//", ";")):
-            i += 1
             continue
 
         kind, tokens = _parse_header(line)
+        if kind == "UNKNOWN":
+            # unknown line: skip
+            continue
+
+        # Coordinate block runs until the next '#' line
+        block_end, next_pos = _find_block_end(text, pos)
+        pts = _parse_points(text[pos:block_end])
+        pos = next_pos
 
         if kind == "POLY":
             # Example: "1 100.0 0"
-            dose = float(tokens[1]) if len(tokens) >= 2 and _is_float_token(tokens[1]) else float("nan")
-            meta = " ".join(tokens)
-
-            pts: List[Tuple[float, float]] = []
-            i += 1
-            while i < len(lines):
-                s = lines[i].strip()
-                if not s:
-                    i += 1
-                    continue
-                if s.startswith("#"):
-                    break
-
-                xy = s.split()
-                if len(xy) >= 2 and _is_float_token(xy[0]) and _is_float_token(xy[1]):
-                    pts.append((float(xy[0]), float(xy[1])))
-                i += 1
-
-            # store if valid
             if len(pts) >= 2:
-                polys.append(Poly(dose=dose, meta=meta, pts=pts))
+                polys.append(Poly(dose=_header_dose(tokens), meta=" ".join(tokens), pts=pts))
+        else:
+            # Example: "L 100.000 1 0.0" followed by two coordinate lines
+            if len(pts) >= 2:
+                p1 = (float(pts[0][0]), float(pts[0][1]))
+                p2 = (float(pts[1][0]), float(pts[1][1]))
+                segs.append(Seg(dose=_header_dose(tokens), meta=" ".join(tokens), p1=p1, p2=p2))
 
-            # move past '#'
-            while i < len(lines) and not lines[i].strip().startswith("#"):
-                i += 1
-            if i < len(lines) and lines[i].strip().startswith("#"):
-                i += 1
-            continue
+        if max_polys and max_segs and len(polys) >= max_polys and len(segs) >= max_segs:
+            break
 
-        if kind == "L":
-            # Example: "L 100.000 1 0.0"
-            dose = float(tokens[1]) if len(tokens) >= 2 and _is_float_token(tokens[1]) else float("nan")
-            meta = " ".join(tokens)
-
-            # next two coordinate lines until '#'
-            coords: List[Tuple[float, float]] = []
-            i += 1
-            while i < len(lines):
-                s = lines[i].strip()
-                if not s:
-                    i += 1
-                    continue
-                if s.startswith("#"):
-                    break
-                xy = s.split()
-                if len(xy) >= 2 and _is_float_token(xy[0]) and _is_float_token(xy[1]):
-                    coords.append((float(xy[0]), float(xy[1])))
-                i += 1
-
-            if len(coords) >= 2:
-                segs.append(Seg(dose=dose, meta=meta, p1=coords[0], p2=coords[1]))
-
-            # move past '#'
-            while i < len(lines) and not lines[i].strip().startswith("#"):
-                i += 1
-            if i < len(lines) and lines[i].strip().startswith("#"):
-                i += 1
-            continue
+    return polys, segs
+
+# Lines per float-conversion chunk in the NumPy parser (bounds peak memory)
+_CHUNK_LINES = 1 << 18
 
-        # unknown line: skip
-        i += 1
+# Byte classes for the NumPy indexer
+_WS, _DIGIT, _SIGN, _OTHER = 0, 1, 2, 3
+if np is not None:
+    _BYTE_CLASS = np.full(256, _OTHER, dtype=np.uint8)
+    _BYTE_CLASS[[9, 10, 11, 12, 13, 32]] = _WS
+    _BYTE_CLASS[ord("0"):ord("9") + 1] = _DIGIT
+    _BYTE_CLASS[[ord("+"), ord("-")]] = _SIGN
+
+
+def _index_asc(data: "bytes | mmap.mmap"):
+    """
+    Vectorized line index of an ASCII file (NumPy).
+
+    Returns (line_start, line_end, ntok, is_poly, is_line, is_term) arrays with
+    one entry per line: byte offsets, token count, and whether the line is a
+    POLY header candidate, an L header candidate or a '#' terminator.
+    """
+    b = np.frombuffer(data, dtype=np.uint8)
+    n = b.size
+
+    nl = np.flatnonzero(b == 10)
+    line_start = np.concatenate(([0], nl + 1))
+    line_end = np.concatenate((nl, [n]))
+    del nl
+
+    cls = _BYTE_CLASS[b]
+    is_ws = cls == _WS
+    tok_starts = np.flatnonzero(is_ws[:-1] & ~is_ws[1:]) + 1
+    tok_ends = np.flatnonzero(~is_ws[:-1] & is_ws[1:]) + 1
+    if n and not is_ws[0]:
+        tok_starts = np.concatenate(([0], tok_starts))
+    if n and not is_ws[-1]:
+        tok_ends = np.append(tok_ends, n)
+    del is_ws
+
+    lo = np.searchsorted(tok_starts, line_start)
+    ntok = np.searchsorted(tok_starts, line_end) - lo
+    has_tok = ntok > 0
+    if not tok_starts.size:
+        zeros = np.zeros(line_start.size, dtype=bool)
+        return line_start, line_end, ntok, zeros, zeros, zeros
+
+    lo = np.minimum(lo, tok_starts.size - 1)
+    first = tok_starts[lo]
+    first_end = tok_ends[lo]
+    del tok_starts, tok_ends, lo
+    c = b[first]
+
+    is_term = has_tok & (c == ord("#"))
+    is_line = has_tok & ((c == ord("L")) | (c == ord("l"))) & (first_end - first == 1)
+
+    # POLY header: first token matches [+-]*[0-9]+, i.e. it ends in a digit and
+    # holds neither another character nor a sign after a digit
+    bad_other = np.flatnonzero(cls == _OTHER)
+    bad_sign = np.flatnonzero((cls[:-1] == _DIGIT) & (cls[1:] == _SIGN)) + 1
+    is_poly = (
+        has_tok
+        & (cls[first_end - 1] == _DIGIT)
+        & (np.searchsorted(bad_other, first) == np.searchsorted(bad_other, first_end))
+        & (np.searchsorted(bad_sign, first) == np.searchsorted(bad_sign, first_end))
+    )
+    return line_start, line_end, ntok, is_poly, is_line, is_term
+
+
+def _parse_asc_indexed(data: "bytes | mmap.mmap") -> Optional[Tuple[List[Poly], SegArray]]:
+    """
+    NumPy parser: index all lines at once, resolve blocks without a per-line
+    loop, and convert clean "x y" lines with one np.array call per chunk.
+    Returns None when the file needs the tolerant line-by-line parser.
+    """
+    line_start, line_end, ntok, is_poly, is_line, is_term = _index_asc(data)
+    n_lines = line_start.size
+
+    # A header candidate opens a block only when the previous header/terminator
+    # event was a terminator (or there is none); the block ends at the next '#'.
+    is_cand = is_poly | is_line
+    ev = np.flatnonzero(is_cand | is_term)
+    ev_cand = is_cand[ev]
+    opens = ev_cand & ~np.concatenate(([False], ev_cand[:-1]))
+    headers = ev[opens]
+    if not headers.size:
+        return [], SegArray.from_segs([])
+    term_lines = np.append(np.flatnonzero(is_term), n_lines)  # sentinel: block runs to EOF
+    block_end = term_lines[np.searchsorted(term_lines, headers, side="right")]
+
+    # Block membership of every line
+    lines = np.arange(n_lines)
+    line_block = np.searchsorted(headers, lines, side="right") - 1
+    safe_block = np.maximum(line_block, 0)
+    in_block = (line_block >= 0) & (lines > headers[safe_block]) & (lines < block_end[safe_block])
+
+    clean = in_block & (ntok == 2)
+    dirty_blocks = set(np.unique(line_block[in_block & (ntok != 0) & (ntok != 2)]).tolist())
+    del lines, safe_block, in_block, ntok, is_line, is_term, is_cand
+
+    # Convert clean coordinate lines in bounded chunks of lines (one np.array call each)
+    line_bounds = np.append(line_start, len(data))
+    lengths = np.diff(line_bounds)
+    b = np.frombuffer(data, dtype=np.uint8)
+    chunks = []
+    for l0 in range(0, n_lines, _CHUNK_LINES):
+        l1 = min(l0 + _CHUNK_LINES, n_lines)
+        mask = np.repeat(clean[l0:l1], lengths[l0:l1])
+        chunk = b[line_bounds[l0]:line_bounds[l1]][mask].tobytes()
+        try:
+            vals = np.array(chunk.split(), dtype=np.float64)
+        except ValueError:
+            return None
+        if vals.size != 2 * int(clean[l0:l1].sum()):
+            return None
+        chunks.append(vals.reshape(-1, 2))
+    del b, lengths
+    pts_all = np.concatenate(chunks) if chunks else np.empty((0, 2))
+    del chunks
+    n_clean = len(pts_all)
+    counts = np.bincount(line_block[clean], minlength=headers.size)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    header_text = b"\n".join(data[a:e] for a, e in zip(line_start[headers].tolist(), line_end[headers].tolist()))
+    meta: List[str] = []
+    dose_tokens: List[str] = []
+    for line in header_text.decode("utf-8", errors="ignore").split("\n"):
+        tokens = line.split()
+        meta.append(" ".join(tokens))
+        dose_tokens.append(tokens[1] if len(tokens) >= 2 else "nan")
+    del header_text
+    try:
+        doses = np.array(dose_tokens, dtype=np.float64)
+    except ValueError:
+        doses = np.array([_header_dose(["", t]) for t in dose_tokens], dtype=np.float64)
+    del dose_tokens
+
+    # Segment endpoints: first two points of each block, gathered at once
+    first_pt = np.minimum(offsets[:-1], max(n_clean - 2, 0))
+    p1_all = pts_all[first_pt] if n_clean >= 2 else np.zeros((headers.size, 2))
+    p2_all = pts_all[first_pt + 1] if n_clean >= 2 else np.zeros((headers.size, 2))
+    valid = counts >= 2
+
+    # Blocks with extra tokens on some line go through the tolerant parser
+    dirty_pts = {}
+    line_bounds_list = line_bounds.tolist()
+    for k in dirty_blocks:
+        start = line_bounds_list[headers[k] + 1]
+        stop = line_bounds_list[block_end[k]]
+        pts = _parse_points(data[start:stop].decode("utf-8", errors="ignore"))
+        dirty_pts[k] = pts
+        valid[k] = len(pts) >= 2
+        if valid[k]:
+            p1_all[k] = pts[0]
+            p2_all[k] = pts[1]
+
+    block_is_poly = is_poly[headers]
+    seg_idx = np.flatnonzero(valid & ~block_is_poly)
+    # Example: "L 100.000 1 0.0" followed by two coordinate lines
+    segs = SegArray(
+        dose=doses[seg_idx],
+        meta=[meta[k] for k in seg_idx.tolist()],
+        p1=p1_all[seg_idx],
+        p2=p2_all[seg_idx],
+    )
+
+    # Example: "1 100.0 0"
+    polys: List[Poly] = []
+    offsets = offsets.tolist()
+    dose_list = doses.tolist()
+    for k in np.flatnonzero(valid & block_is_poly).tolist():
+        pts = dirty_pts[k] if k in dirty_pts else pts_all[offsets[k]:offsets[k + 1]]
+        polys.append(Poly(dose=dose_list[k], meta=meta[k], pts=pts))
 
     return polys, segs
 
-def run_pyqtgraph(path: Path, polys: List[Poly], segs: List[Seg], draw_polys=True, draw_lines=True):
+
+def parse_asc(path: Path, max_polys: int = 0, max_segs: int = 0) -> "Tuple[List[Poly], SegArray | List[Seg]]":
+    """
+    Returns (polys, segs). With NumPy, segs is a SegArray; otherwise a list of Seg.
+    max_polys / max_segs (0 = all) keep only the first N of each; when both are
+    given, parsing stops as soon as both are reached.
+    """
+    parsed = None
+    # With both limits the text parser stops early, which beats indexing the whole file
+    if np is not None and not (max_polys and max_segs):
+        # Map the file instead of reading it: the indexer works on the raw bytes
+        # and only slices out header lines and irregular blocks
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return [], SegArray.from_segs([])
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                parsed = _parse_asc_indexed(mm)
+    if parsed is not None:
+        polys, segs = parsed
+    else:
+        polys, segs = _parse_asc_text(path.read_text(encoding="utf-8", errors="ignore"), max_polys, max_segs)
+        if np is not None:
+            segs = SegArray.from_segs(segs)
+    if max_polys:
+        polys = polys[:max_polys]
+    if max_segs:
+        segs = segs[:max_segs]
+    return polys, segs
+
+def _add_path_item(plot, x, y, color):
+    """
+    Add NaN-separated polylines as one static QGraphicsPathItem: the QPainterPath
+    is built once here instead of by a PlotCurveItem on every repaint.
+    """
+    path = pg.functions.arrayToQPath(x, y, connect="finite")
+    item = QtWidgets.QGraphicsPathItem(path)
+    item.setPen(pg.mkPen(color, width=1))
+    plot.addItem(item)
+
+def run_pyqtgraph(path: Path, polys: List[Poly], segs: SegArray, draw_polys=True, draw_lines=True):
     # Setup PyQtGraph app
     app = pg.mkQApp("RoastView")
     win = pg.GraphicsLayoutWidget(show=True, title=f"RoastView - {path.name}")
@@ -182,63 +478,59 @@ def run_pyqtgraph(path: Path, polys: List[Poly], segs: List[Seg], draw_polys=Tru
     
     # Render polygons as a single connect="finite" path (very fast)
     if draw_polys and polys and np is not None:
-        # Build giant array separated by NaNs
-        xs_list = []
-        ys_list = []
-        for p in polys:
-            if not p.pts: continue
-            # Unzip points
-            px, py = zip(*p.pts)
-            xs_list.extend(px)
-            xs_list.append(np.nan) # break line
-            ys_list.extend(py)
-            ys_list.append(np.nan)
-        
-        arr_x = np.array(xs_list, dtype=np.float32)
-        arr_y = np.array(ys_list, dtype=np.float32)
+        # One preallocated buffer: each ring followed by a NaN row (break line)
+        sizes = [len(p.pts) for p in polys]
+        xy = np.full((sum(sizes) + len(polys), 2), np.nan)
+        k = 0
+        for p, n in zip(polys, sizes):
+            xy[k:k + n] = p.pts
+            k += n + 1
         
-        plot.plot(arr_x, arr_y, pen=pg.mkPen('c', width=1), connect="finite", name="Polygons")
+        _add_path_item(plot, xy[:, 0], xy[:, 1], 'c')
 
     # Render segments
     if draw_lines and segs and np is not None:
-        # Build giant array: p1, p2, nan, p1, p2, nan...
-        count = len(segs)
-        p1s = np.array([s.p1 for s in segs])
-        p2s = np.array([s.p2 for s in segs])
-        nans = np.full(count, np.nan)
+        # One preallocated buffer holding x and y rows: p1, p2, nan, p1, p2, nan...
+        buf = np.full((2, len(segs), 3), np.nan)
+        buf[:, :, 0] = segs.p1.T
+        buf[:, :, 1] = segs.p2.T
         
-        # Interleave columns
-        seg_x = np.column_stack((p1s[:,0], p2s[:,0], nans)).flatten()
-        seg_y = np.column_stack((p1s[:,1], p2s[:,1], nans)).flatten()
-        
-        plot.plot(seg_x, seg_y, pen=pg.mkPen('m', width=1), connect="finite", name="Segments")
+        _add_path_item(plot, buf[0].ravel(), buf[1].ravel(), 'm')
         
     pg.exec()
 
-def run_matplotlib(path: Path, polys: List[Poly], segs: List[Seg], args, draw_polys, draw_lines):
-    if plt is None:
+def run_matplotlib(path: Path, polys: List[Poly], segs: "SegArray | List[Seg]", args, draw_polys, draw_lines):
+    if not _load_matplotlib():
         print("Error: Matplotlib not available.")
         return
 
-    # Use collections for speed if possible
-    from matplotlib.collections import PolyCollection, LineCollection
+    # One compound Path per kind: a single artist instead of one per polygon/segment
+    from matplotlib.path import Path as MplPath
+    from matplotlib.patches import PathPatch
     
     fig, ax = plt.subplots()
 
     # Draw polygons (outline)
     if draw_polys and polys:
-        # Optimization: use PolyCollection
-        verts = [p.pts for p in polys]
-        pc = PolyCollection(verts, edgecolors='tab:blue', facecolors='none', linewidths=1)
-        ax.add_collection(pc)
+        # Concatenate all rings; each ring gets MOVETO ... LINETO ... CLOSEPOLY
+        pts = np.concatenate([np.asarray(p.pts, dtype=np.float64) for p in polys])
+        sizes = np.array([len(p.pts) for p in polys])
+        offsets = np.concatenate(([0], np.cumsum(sizes)))
+        verts = np.insert(pts, offsets[1:], pts[offsets[:-1]], axis=0)
+        codes = np.full(len(verts), MplPath.LINETO, dtype=MplPath.code_type)
+        ring = np.arange(len(polys))
+        codes[offsets[:-1] + ring] = MplPath.MOVETO
+        codes[offsets[1:] + ring] = MplPath.CLOSEPOLY
+        ax.add_patch(PathPatch(MplPath(verts, codes), edgecolor='tab:blue', facecolor='none', linewidth=1))
         ax.autoscale_view()
 
     # Draw line segments
     if draw_lines and segs:
-        # Optimization: use LineCollection
-        segments = [(s.p1, s.p2) for s in segs]
-        lc = LineCollection(segments, colors='tab:orange', linewidths=0.8)
-        ax.add_collection(lc)
+        if not isinstance(segs, SegArray):
+            segs = SegArray.from_segs(segs)
+        verts = np.stack((segs.p1, segs.p2), axis=1).reshape(-1, 2)
+        codes = np.tile(np.array([MplPath.MOVETO, MplPath.LINETO], dtype=MplPath.code_type), len(segs))
+        ax.add_patch(PathPatch(MplPath(verts, codes), edgecolor='tab:orange', facecolor='none', linewidth=0.8))
         ax.autoscale_view()
         
     # If standard fallback needed (slow loop), not used here.
@@ -279,12 +571,12 @@ def main():
     # File selection if not provided
     if not file_path:
         # Prefer Qt dialog if we might use PyQtGraph or if tk is missing
-        if HAS_PYQTGRAPH and (tk is None or args.backend == 'pg'):
+        if HAS_PYQTGRAPH and (args.backend == 'pg' or not _load_tk()) and _load_pyqtgraph():
             app = pg.mkQApp("RoastView") # Ensure app exists
             fname, _ = QtWidgets.QFileDialog.getOpenFileName(None, "Select Raith ASCII file", "", "Raith ASCII (*.asc *.acs);;All files (*.*)")
             if fname:
                 file_path = fname
-        elif tk:
+        elif _load_tk():
             # Fallback to Tk
             root = tk.Tk()
             root.withdraw()
@@ -306,7 +598,7 @@ def main():
         raise FileNotFoundError(f"Input file not found: {path}")
 
     print(f"Parsing {path.name}...")
-    polys, segs = parse_asc(path)
+    polys, segs = parse_asc(path, max(args.max_polys, 0), max(args.max_lines, 0))
     print(f"Found {len(polys)} polygons, {len(segs)} segments.")
 
     draw_polys = True
@@ -317,17 +609,12 @@ def main():
 
     draw_lines = not args.no_lines
 
-    if args.max_polys and args.max_polys > 0:
-        polys = polys[: args.max_polys]
-    if args.max_lines and args.max_lines > 0:
-        segs = segs[: args.max_lines]
-
     # Select backend
     if args.save:
         # Always use matplotlib for saving files (PyQtGraph export is more complex/limited)
         print("Saving requested, using Matplotlib backend...")
         run_matplotlib(path, polys, segs, args, draw_polys, draw_lines)
-    elif args.backend == "pg" and HAS_PYQTGRAPH and np is not None:
+    elif args.backend == "pg" and np is not None and _load_pyqtgraph():
         print("Using PyQtGraph backend (fast)...")
         run_pyqtgraph(path, polys, segs, draw_polys, draw_lines)
     else:
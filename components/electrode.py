@@ -3,13 +3,35 @@
 电极组件模块 - 支持多种形状和扇出配置
 """
 
+import math
 import pya
 from config import LAYER_DEFINITIONS, ELECTRODE_SHAPES, FANOUT_CONFIG
 from utils.geometry import GeometryUtils
 
+# 正交旋转角（弧度）-> KLayout 整数旋转码，可走无浮点矩阵的快速路径
+_ORTHO_ROT = {0.0: 0, math.pi / 2: 1, math.pi: 2, 3 * math.pi / 2: 3}
+
+# 扇出方向 -> (x方向符号, y方向符号)
+_FANOUT_DIRS = {'left': (-1, 0), 'right': (1, 0), 'up': (0, 1), 'down': (0, -1)}
+
+def _centered_box(x, y, width, height):
+    """返回以 (x, y) 为中心的整数数据库单位矩形（输入单位μm）"""
+    s = GeometryUtils.UNIT_SCALE
+    cx, cy = x * s, y * s
+    w2, h2 = width * s / 2, height * s / 2
+    return pya.Box(int(cx - w2), int(cy - h2), int(cx + w2), int(cy + h2))
+
+
 class Electrode:
     """电极基类"""
     
+    __slots__ = (
+        'x', 'y', 'width', 'height', 'layer_name', 'shape', 'layer_id',
+        'radius', 'angle',
+        'fanout_enabled', 'fanout_direction', 'fanout_style', 'fanout_length', 'fanout_width', 'pad_size',
+        'process_notes', 'shapes', 'fanout_shapes', 'pad_shapes',
+    )
+    
     def __init__(self, x, y, width, height, layer_name, shape='rectangle', **kwargs):
         self.x = x
         self.y = y
@@ -32,12 +54,20 @@ class Electrode:
         self.pad_size = kwargs.get('pad_size', FANOUT_CONFIG['pad_size'])
         
         # 工艺备注
-        self.process_notes = kwargs.get('process_notes', [])
+        self.process_notes = kwargs.get('process_notes')
         
-        # 生成的形状
-        self.shapes = []
-        self.fanout_shapes = []
-        self.pad_shapes = []
+        # 生成的形状（首次添加时才创建列表）
+        self.shapes = None
+        self.fanout_shapes = None
+        self.pad_shapes = None
+    
+    def _append(self, name, item):
+        """向名为 name 的列表属性追加元素，列表为 None 时先创建"""
+        items = getattr(self, name)
+        if items is None:
+            items = []
+            setattr(self, name, items)
+        items.append(item)
         
     def create_shape(self):
         """创建电极主体形状"""
@@ -53,15 +83,22 @@ class Electrode:
             # 默认矩形
             shape = GeometryUtils.create_rectangle(self.x, self.y, self.width, self.height, center=True)
         
-        # 应用旋转
+        # 应用旋转（绕电极中心）
         if self.angle != 0:
-            import math
-            cos_a = math.cos(self.angle)
-            sin_a = math.sin(self.angle)
-            trans = pya.Trans(cos_a, sin_a, -sin_a, cos_a, self.x, self.y)
+            s = GeometryUtils.UNIT_SCALE
+            cx, cy = int(round(self.x * s)), int(round(self.y * s))
+            rot = _ORTHO_ROT.get(self.angle)
+            if rot is not None:
+                # 0/90/180/270度：整数旋转码，无需浮点矩阵
+                trans = pya.Trans(cx, cy) * pya.Trans(rot, False, 0, 0) * pya.Trans(-cx, -cy)
+            else:
+                # 任意角度：复变换，矩形需先转为多边形以免退化为外接框
+                trans = pya.ICplxTrans(cx, cy) * pya.ICplxTrans(1.0, math.degrees(self.angle), False, 0, 0) * pya.ICplxTrans(-cx, -cy)
+                if isinstance(shape, pya.Box):
+                    shape = pya.Polygon(shape)
             shape = shape.transformed(trans)
         
-        self.shapes.append(shape)
+        self._append('shapes', shape)
         return shape
     
     def create_fanout(self):
@@ -69,36 +106,22 @@ class Electrode:
         if not self.fanout_enabled:
             return []
         
-        # 计算扇出起点（电极边缘）
-        if self.fanout_direction == 'left':
-            start_x = self.x - self.width / 2
-            start_y = self.y
-            end_x = start_x - self.fanout_length
-            end_y = start_y
-        elif self.fanout_direction == 'right':
-            start_x = self.x + self.width / 2
-            start_y = self.y
-            end_x = start_x + self.fanout_length
-            end_y = start_y
-        elif self.fanout_direction == 'up':
-            start_x = self.x
-            start_y = self.y + self.height / 2
-            end_x = start_x
-            end_y = start_y + self.fanout_length
-        elif self.fanout_direction == 'down':
-            start_x = self.x
-            start_y = self.y - self.height / 2
-            end_x = start_x
-            end_y = start_y - self.fanout_length
-        else:
+        direction = _FANOUT_DIRS.get(self.fanout_direction)
+        if direction is None:
             return []
+        sx, sy = direction
+        
+        # 计算扇出起点（电极边缘）与终点
+        start_x = self.x + sx * self.width / 2
+        start_y = self.y + sy * self.height / 2
+        end_x = start_x + sx * self.fanout_length
+        end_y = start_y + sy * self.fanout_length
         
         # 创建引线
         if self.fanout_style == 'straight':
-            wire = GeometryUtils.create_rectangle(
+            wire = _centered_box(
                 (start_x + end_x) / 2, (start_y + end_y) / 2,
-                abs(end_x - start_x) + self.fanout_width, self.fanout_width,
-                center=True
+                abs(end_x - start_x) + self.fanout_width, self.fanout_width
             )
         elif self.fanout_style == 'curved':
             wire = GeometryUtils.create_curved_wire(start_x, start_y, end_x, end_y, self.fanout_width)
@@ -111,7 +134,7 @@ class Electrode:
                 center=True
             )
         
-        self.fanout_shapes.append(wire)
+        self._append('fanout_shapes', wire)
         return wire
     
     def create_pad(self):
@@ -119,25 +142,18 @@ class Electrode:
         if not self.fanout_enabled:
             return None
         
-        # 计算焊盘位置
-        if self.fanout_direction == 'left':
-            pad_x = self.x - self.width / 2 - self.fanout_length
-            pad_y = self.y
-        elif self.fanout_direction == 'right':
-            pad_x = self.x + self.width / 2 + self.fanout_length
-            pad_y = self.y
-        elif self.fanout_direction == 'up':
-            pad_x = self.x
-            pad_y = self.y + self.height / 2 + self.fanout_length
-        elif self.fanout_direction == 'down':
-            pad_x = self.x
-            pad_y = self.y - self.height / 2 - self.fanout_length
-        else:
+        direction = _FANOUT_DIRS.get(self.fanout_direction)
+        if direction is None:
             return None
+        sx, sy = direction
+        
+        # 计算焊盘位置（扇出终点）
+        pad_x = self.x + sx * self.width / 2 + sx * self.fanout_length
+        pad_y = self.y + sy * self.height / 2 + sy * self.fanout_length
         
         # 创建焊盘
-        pad = GeometryUtils.create_rectangle(pad_x, pad_y, self.pad_size, self.pad_size, center=True)
-        self.pad_shapes.append(pad)
+        pad = _centered_box(pad_x, pad_y, self.pad_size, self.pad_size)
+        self._append('pad_shapes', pad)
         return pad
     
     def generate(self):
@@ -151,23 +167,25 @@ class Electrode:
         # 创建焊盘
         self.create_pad()
         
-        return self.shapes + self.fanout_shapes + self.pad_shapes
+        return self.get_all_shapes()
     
     def get_all_shapes(self):
         """获取所有形状"""
-        return self.shapes + self.fanout_shapes + self.pad_shapes
+        return (self.shapes or []) + (self.fanout_shapes or []) + (self.pad_shapes or [])
     
     def add_process_note(self, note):
         """添加工艺备注"""
-        self.process_notes.append(note)
+        self._append('process_notes', note)
     
     def get_process_notes(self):
         """获取工艺备注"""
-        return self.process_notes
+        return self.process_notes if self.process_notes is not None else []
 
 class GateElectrode(Electrode):
     """栅极电极类"""
     
+    __slots__ = ('gate_type', 'gate_overlap', 'contact_size')
+    
     def __init__(self, x, y, width, height, layer_name, gate_type='bottom', **kwargs):
         super().__init__(x, y, width, height, layer_name, **kwargs)
         self.gate_type = gate_type  # 'bottom' 或 'top'
@@ -186,12 +204,14 @@ class GateElectrode(Electrode):
         contact = GeometryUtils.create_rectangle(
             contact_x, contact_y, self.contact_size, self.contact_size, center=True
         )
-        self.shapes.append(contact)
+        self._append('shapes', contact)
         return contact
 
 class SourceDrainElectrode(Electrode):
     """源漏电极类"""
     
+    __slots__ = ('electrode_type', 'contact_size')
+    
     def __init__(self, x, y, width, height, layer_name, electrode_type='source', **kwargs):
         super().__init__(x, y, width, height, layer_name, **kwargs)
         self.electrode_type = electrode_type  # 'source' 或 'drain'
@@ -209,12 +229,14 @@ class SourceDrainElectrode(Electrode):
         contact = GeometryUtils.create_rectangle(
             contact_x, contact_y, self.contact_size, self.contact_size, center=True
         )
-        self.shapes.append(contact)
+        self._append('shapes', contact)
         return contact
 
 class PadElectrode(Electrode):
     """焊盘电极类"""
     
+    __slots__ = ('pad_label', 'pad_number')
+    
     def __init__(self, x, y, size, layer_name='pads', **kwargs):
         super().__init__(x, y, size, size, layer_name, shape='rounded', **kwargs)
         self.pad_label = kwargs.get('pad_label', '')
@@ -8,6 +8,11 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import klayout.db as db
+try:
+    import pya as _pya
+    Region = _pya.Region
+except Exception:
+    Region = db.Region
 from utils.geometry import GeometryUtils
 from utils.mark_utils import MarkUtils
 from utils.fanout_utils import draw_pad, draw_trapezoidal_fanout
@@ -18,6 +23,29 @@ from config import LAYER_DEFINITIONS, DEFAULT_UNIT_SCALE
 class FET:
     """场效应晶体管器件类"""
     
+    # 标记类型 -> (MarkUtils生成函数, 是否需要线宽参数)
+    _MARK_TABLE = {
+        'cross': (MarkUtils.cross, True),
+        'square': (MarkUtils.square, False),
+        'circle': (MarkUtils.circle, False),
+        'diamond': (MarkUtils.diamond, False),
+        'triangle': (MarkUtils.triangle, False),
+        'l': (MarkUtils.l, True),
+        't': (MarkUtils.t, True),
+        'semi_cross': (MarkUtils.semi_cross, True),
+        'cross_pos': (MarkUtils.cross_pos, False),
+        'cross_neg': (MarkUtils.cross_neg, False),
+        'l_shape': (MarkUtils.l_shape, False),
+        't_shape': (MarkUtils.t_shape, False),
+        'sq_missing': (MarkUtils.sq_missing, False),
+        'sq_missing_border': (MarkUtils.sq_missing_border, False),
+        'cross_tri': (MarkUtils.cross_tri, False),
+        'regular_polygon': (MarkUtils.regular_polygon, False),
+        'chamfered_octagon': (MarkUtils.chamfered_octagon, False),
+    }
+    # 单元格实例插入共用的恒等变换
+    _IDENTITY_TRANS = db.Trans(0, 0)
+    
     def __init__(self, layout=None, **kwargs):
         """
         初始化FET器件类
@@ -27,6 +55,9 @@ class FET:
             **kwargs: 其他参数，包括器件、标记、扇出、编号等相关参数
         """
         self.layout = layout or db.Layout()
+        # 每μm对应的数据库单位数：电极、器件平移与阵列步距均按GeometryUtils.UNIT_SCALE换算，
+        # 此处取同一尺度而不随layout.dbu变化，保证整个类的几何尺度一致
+        self._dbu_inv = int(round(GeometryUtils.UNIT_SCALE))
         self.setup_layers()
         
         # ===== 器件核心参数 =====
@@ -55,6 +86,7 @@ class FET:
         self.outer_pad_size = kwargs.get('outer_pad_size', 100.0)   # 外部焊盘尺寸 (μm)
         self.chamfer_size = kwargs.get('chamfer_size', 10.0)        # 倒角尺寸 (μm)
         self.chamfer_type = kwargs.get('chamfer_type', 'straight')  # 倒角类型: 'straight', 'rounded', 'none'
+        self.merge_fanout = kwargs.get('merge_fanout', True)        # 是否将内焊盘、扇出、外焊盘合并为一个多边形
         
         # ===== 电极参数 =====
         # 底栅电极参数
@@ -87,12 +119,33 @@ class FET:
         self.label_offset_y = kwargs.get('label_offset_y', -0.0)  # 编号位置Y偏移量 (μm)
         self.use_digital_display = kwargs.get('use_digital_display', False)  # 是否使用DigitalDisplay，默认False（使用TextUtils）
         
+        # ===== 缓存 =====
+        # 器件参数 (ch_width, ch_len, gate_space, gate_width) -> 原点处的器件原型单元格
+        self._device_cache = {}
+        # 对准标记单元格缓存（与器件参数无关，按标记设置复用）
+        self._marks_cells = {}
+        # (字符, 尺寸, 线宽) -> 原点处的DigitalDisplay字符多边形
+        self._digit_cache = {}
+        # (字符, 字高, 字体, 锚点) -> 原点处栅格化的TextUtils字符多边形
+        self._glyph_cache = {}
+        
     def setup_layers(self):
         """设置图层"""
-        for layer_name, layer_info in LAYER_DEFINITIONS.items():
-            # 在KLayout中，使用layer()方法获取或创建图层
-            # layer()方法需要(layer_number, datatype)参数
-            self.layout.layer(layer_info['id'], 0)  # 使用datatype=0
+        # 在KLayout中，使用layer()方法获取或创建图层，返回的是版图内的图层索引
+        # layer()方法需要(layer_number, datatype)参数，使用datatype=0
+        self._lix = {
+            layer_name: self.layout.layer(layer_info['id'], 0)
+            for layer_name, layer_info in LAYER_DEFINITIONS.items()
+        }
+        
+        # 缓存各几何方法使用的图层索引，避免每个器件重复查表
+        self._lid_bottom_gate = self._lix['bottom_gate']
+        self._lid_top_dielectric = self._lix['top_dielectric']
+        self._lid_channel = self._lix['channel']
+        self._lid_source_drain = self._lix['source_drain']
+        self._lid_top_gate = self._lix['top_gate']
+        self._lid_alignment = self._lix['alignment_marks']
+        self._lid_labels = self._lix['labels']
     
     def set_device_parameters(self, ch_width=None, ch_len=None, gate_space=None, gate_width=None):
         """
@@ -121,7 +174,7 @@ class FET:
             cell: 目标单元格
             x, y: 器件中心坐标
         """
-        layer_id = LAYER_DEFINITIONS['bottom_gate']['id']
+        layer_id = self._lid_bottom_gate
         
         # 底栅1电极 (左侧)
         # Inner pad - 左栅极右边缘距离中心 gate_space/2
@@ -132,7 +185,6 @@ class FET:
             chamfer_size=0 if self.bottom_gate_inner_chamfer == 'none' else self.chamfer_size,
             chamfer_type=self.bottom_gate_inner_chamfer
         )
-        cell.shapes(layer_id).insert(inner_pad1.polygon)
         
         # Outer pad
         outer_pad1 = draw_pad(
@@ -143,11 +195,9 @@ class FET:
             chamfer_size=0 if self.bottom_gate_outer_chamfer == 'none' else self.chamfer_size,
             chamfer_type=self.bottom_gate_outer_chamfer
         )
-        cell.shapes(layer_id).insert(outer_pad1.polygon)
         
         # 梯形扇出
         fanout1 = draw_trapezoidal_fanout(inner_pad1, outer_pad1)
-        cell.shapes(layer_id).insert(fanout1)
         
         # 底栅2电极 (右侧)
         # Inner pad - 右栅极左边缘距离中心 gate_space/2
@@ -158,7 +208,6 @@ class FET:
             chamfer_size=0 if self.bottom_gate_inner_chamfer == 'none' else self.chamfer_size,
             chamfer_type=self.bottom_gate_inner_chamfer
         )
-        cell.shapes(layer_id).insert(inner_pad2.polygon)
         
         # Outer pad
         outer_pad2 = draw_pad(
@@ -169,11 +218,15 @@ class FET:
             chamfer_size=0 if self.bottom_gate_outer_chamfer == 'none' else self.chamfer_size,
             chamfer_type=self.bottom_gate_outer_chamfer
         )
-        cell.shapes(layer_id).insert(outer_pad2.polygon)
         
         # 梯形扇出
         fanout2 = draw_trapezoidal_fanout(inner_pad2, outer_pad2)
-        cell.shapes(layer_id).insert(fanout2)
+        
+        # 一次性插入所有多边形
+        self._insert_electrodes(cell, layer_id, [
+            inner_pad1.polygon, outer_pad1.polygon, fanout1,
+            inner_pad2.polygon, outer_pad2.polygon, fanout2
+        ])
     
     def create_dielectric_layer(self, cell, x=0.0, y=0.0):
         """
@@ -183,16 +236,10 @@ class FET:
             cell: 目标单元格
             x, y: 器件中心坐标
         """
-        layer_id = LAYER_DEFINITIONS['top_dielectric']['id']
+        layer_id = self._lid_top_dielectric
         
         # 绝缘层矩形
-        dielectric = GeometryUtils.create_rectangle(
-            x, y,
-            self.ch_len * 2,
-            self.ch_width * 2,
-            center=True
-        )
-        cell.shapes(layer_id).insert(dielectric)
+        cell.shapes(layer_id).insert(self._centered_box(x, y, self.ch_len * 2, self.ch_width * 2))
     
     def create_channel_material(self, cell, x=0.0, y=0.0):
         """
@@ -202,22 +249,22 @@ class FET:
             cell: 目标单元格
             x, y: 器件中心坐标
         """
-        layer_id = LAYER_DEFINITIONS['channel']['id']
+        layer_id = self._lid_channel
         
         # 沟道材料矩形
-        channel = GeometryUtils.create_rectangle(
-            x, y,
-            self.ch_len * 3,
-            self.ch_width,
-            center=True
-        )
-        cell.shapes(layer_id).insert(channel)
+        cell.shapes(layer_id).insert(self._centered_box(x, y, self.ch_len * 3, self.ch_width))
+    
+    def _centered_box(self, x, y, width, height):
+        """返回以 (x, y) 为中心的整数数据库单位矩形（输入单位μm）"""
+        cx, cy = x * self._dbu_inv, y * self._dbu_inv
+        w2, h2 = width * self._dbu_inv / 2, height * self._dbu_inv / 2
+        return db.Box(int(cx - w2), int(cy - h2), int(cx + w2), int(cy + h2))
     
     def create_source_drain_electrodes(self, cell, x=0.0, y=0.0):
         """
         创建源漏电极（含inner/outer pad和扇出）
         """
-        layer_id = LAYER_DEFINITIONS['source_drain']['id']
+        layer_id = self._lid_source_drain
 
         # 源极 inner pad
         source_inner = draw_pad(
@@ -227,7 +274,6 @@ class FET:
             chamfer_size=0 if self.source_drain_inner_chamfer == 'none' else self.chamfer_size,
             chamfer_type=self.source_drain_inner_chamfer
         )
-        cell.shapes(layer_id).insert(source_inner.polygon)
 
         # 源极 outer pad
         source_outer = draw_pad(
@@ -238,36 +284,21 @@ class FET:
             chamfer_size=0 if self.source_drain_outer_chamfer == 'none' else self.chamfer_size,
             chamfer_type=self.source_drain_outer_chamfer
         )
-        cell.shapes(layer_id).insert(source_outer.polygon)
 
         # 源极扇出
         source_fanout = draw_trapezoidal_fanout(source_inner, source_outer)
-        cell.shapes(layer_id).insert(source_fanout)
 
-        # 漏极 inner pad
-        drain_inner = draw_pad(
-            center=(x + self.ch_len, y),
-            length=self.ch_len,
-            width=self.ch_width * self.source_drain_inner_width_ratio,
-            chamfer_size=0 if self.source_drain_inner_chamfer == 'none' else self.chamfer_size,
-            chamfer_type=self.source_drain_inner_chamfer
-        )
-        cell.shapes(layer_id).insert(drain_inner.polygon)
+        # 漏极：与源极关于器件中心竖直轴镜像
+        mirror = self._mirror_trans(x)
 
-        # 漏极 outer pad
-        drain_outer = draw_pad(
-            center=(x + self.ch_len/2 + self.source_drain_outer_offset_x, 
-                   y + self.source_drain_outer_offset_y),
-            length=self.outer_pad_size,
-            width=self.outer_pad_size,
-            chamfer_size=0 if self.source_drain_outer_chamfer == 'none' else self.chamfer_size,
-            chamfer_type=self.source_drain_outer_chamfer
-        )
-        cell.shapes(layer_id).insert(drain_outer.polygon)
-
-        # 漏极扇出
-        drain_fanout = draw_trapezoidal_fanout(drain_inner, drain_outer)
-        cell.shapes(layer_id).insert(drain_fanout)
+        # 一次性插入所有多边形
+        polys = [source_inner.polygon, source_outer.polygon, source_fanout]
+        polys += [poly.transformed(mirror) for poly in polys]
+        self._insert_electrodes(cell, layer_id, polys)
+    
+    def _mirror_trans(self, x):
+        """返回关于竖直线 X=x (μm) 的镜像变换"""
+        return db.Trans(db.Trans.M90, db.Vector(int(round(2 * x * self._dbu_inv)), 0))
     
     def create_top_gate_electrode(self, cell, x=0.0, y=0.0):
         """
@@ -277,7 +308,7 @@ class FET:
             cell: 目标单元格
             x, y: 器件中心坐标
         """
-        layer_id = LAYER_DEFINITIONS['top_gate']['id']
+        layer_id = self._lid_top_gate
         
         # Inner pad
         inner_pad = draw_pad(
@@ -287,7 +318,6 @@ class FET:
             chamfer_size=0 if self.top_gate_inner_chamfer == 'none' else self.chamfer_size,
             chamfer_type=self.top_gate_inner_chamfer
         )
-        cell.shapes(layer_id).insert(inner_pad.polygon)
         
         # Outer pad
         outer_pad = draw_pad(
@@ -297,11 +327,25 @@ class FET:
             chamfer_size=0 if self.top_gate_outer_chamfer == 'none' else self.chamfer_size,
             chamfer_type=self.top_gate_outer_chamfer
         )
-        cell.shapes(layer_id).insert(outer_pad.polygon)
         
         # 梯形扇出
         fanout = draw_trapezoidal_fanout(inner_pad, outer_pad)
-        cell.shapes(layer_id).insert(fanout)
+        self._insert_electrodes(cell, layer_id, [inner_pad.polygon, outer_pad.polygon, fanout])
+    
+    def _insert_electrodes(self, cell, layer_id, polys):
+        """
+        插入电极多边形；merge_fanout 为真时先在KLayout中合并相接的焊盘与扇出，
+        每个电极只保留一个多边形
+        
+        Args:
+            cell: 目标单元格
+            layer_id: 图层编号
+            polys: 焊盘与扇出多边形列表
+        """
+        region = Region(polys)
+        if self.merge_fanout:
+            region.merge()
+        cell.shapes(layer_id).insert(region)
     
     def create_alignment_marks(self, cell, x=0.0, y=0.0, device_id=None, row=None, col=None, label_type=None):
         """
@@ -315,7 +359,8 @@ class FET:
             col: 列号（用于生成字母+数字格式的标记）
             label_type: 标签类型，'textutils' 或 'digital'
         """
-        layer_id = LAYER_DEFINITIONS['alignment_marks']['id']
+        layer_id = self._lid_alignment
+        layer_shapes = cell.shapes(layer_id)
         
         # 计算器件边界
         device_width = self.device_margin_x * 2
@@ -330,50 +375,20 @@ class FET:
         ]
 
         # 创建标记
+        n_types = len(self.mark_types)
+        n_rotations = len(self.mark_rotations)
         for i, (mark_x, mark_y) in enumerate(mark_positions):
-            mark_type = self.mark_types[i] if i < len(self.mark_types) else 'cross'
+            mark_type = self.mark_types[i] if i < n_types else 'cross'
             
-            # 根据MarkUtils中的函数名创建对应的标记
-            if mark_type == 'cross':
-                marks = MarkUtils.cross(mark_x, mark_y, self.mark_size, self.mark_width)
-            elif mark_type == 'square':
-                marks = MarkUtils.square(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'circle':
-                marks = MarkUtils.circle(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'diamond':
-                marks = MarkUtils.diamond(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'triangle':
-                marks = MarkUtils.triangle(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'l':
-                marks = MarkUtils.l(mark_x, mark_y, self.mark_size, self.mark_width)
-            elif mark_type == 't':
-                marks = MarkUtils.t(mark_x, mark_y, self.mark_size, self.mark_width)
-            elif mark_type == 'semi_cross':
-                marks = MarkUtils.semi_cross(mark_x, mark_y, self.mark_size, self.mark_width)
-            elif mark_type == 'cross_pos':
-                marks = MarkUtils.cross_pos(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'cross_neg':
-                marks = MarkUtils.cross_neg(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'l_shape':
-                marks = MarkUtils.l_shape(mark_x, mark_y, self.mark_size)
-            elif mark_type == 't_shape':
-                marks = MarkUtils.t_shape(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'sq_missing':
-                marks = MarkUtils.sq_missing(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'sq_missing_border':
-                marks = MarkUtils.sq_missing_border(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'cross_tri':
-                marks = MarkUtils.cross_tri(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'regular_polygon':
-                marks = MarkUtils.regular_polygon(mark_x, mark_y, self.mark_size)
-            elif mark_type == 'chamfered_octagon':
-                marks = MarkUtils.chamfered_octagon(mark_x, mark_y, self.mark_size)
+            # 根据MarkUtils中的函数名创建对应的标记，未知类型默认使用十字标记
+            mark_func, needs_width = self._MARK_TABLE.get(mark_type, self._MARK_TABLE['cross'])
+            if needs_width:
+                marks = mark_func(mark_x, mark_y, self.mark_size, self.mark_width)
             else:
-                # 默认使用十字标记
-                marks = MarkUtils.cross(mark_x, mark_y, self.mark_size, self.mark_width)
+                marks = mark_func(mark_x, mark_y, self.mark_size)
             
             # 根据mark_rotations参数旋转标记
-            rotation_angle = self.mark_rotations[i] if i < len(self.mark_rotations) else 0
+            rotation_angle = self.mark_rotations[i] if i < n_rotations else 0
             if rotation_angle > 0:
                 marks = marks.rotate(rotation_angle)  # 直接使用0,1,2,3作为旋转参数
             
@@ -381,24 +396,39 @@ class FET:
             shapes = marks.get_shapes()
             if isinstance(shapes, list):
                 for shape in shapes:
-                    cell.shapes(layer_id).insert(shape)
+                    layer_shapes.insert(shape)
             else:
-                cell.shapes(layer_id).insert(shapes)
+                layer_shapes.insert(shapes)
         
         # 在右上角cross mark的右下角添加数字编号
         if device_id is not None:
-            # 计算数字标记位置（右上角cross mark的右下角）
-            mark_x, mark_y = mark_positions[0]  # 右上角位置
-            # 向右下偏移，避开cross mark
-            label_x = mark_x + self.mark_size * 0.8
-            label_y = mark_y - self.mark_size * 0.8
-            
-            # 如果有行列信息，使用字母+数字格式；否则使用纯数字
-            if row is not None and col is not None:
-                self.create_device_label(cell, label_x, label_y, row, col, label_type)
-            else:
-                # 将 device_id 转换为字符串，作为纯数字标记
-                self.create_device_label(cell, label_x, label_y, device_id - 1, 0, label_type)  # 假设为第0列
+            self._place_device_label(cell, x, y, device_id, row, col, label_type)
+    
+    def _place_device_label(self, cell, x, y, device_id, row=None, col=None, label_type=None):
+        """
+        在器件左上角标记的右下方放置编号标签
+        
+        Args:
+            cell: 目标单元格
+            x, y: 器件中心坐标
+            device_id: 器件编号
+            row: 行号
+            col: 列号
+            label_type: 标签类型，'textutils' 或 'digital'
+        """
+        # 计算数字标记位置（左上角mark的右下角）
+        mark_x = x - self.device_margin_x + self.mark_margin
+        mark_y = y + self.device_margin_y - self.mark_margin
+        # 向右下偏移，避开mark
+        label_x = mark_x + self.mark_size * 0.8
+        label_y = mark_y - self.mark_size * 0.8
+        
+        # 如果有行列信息，使用字母+数字格式；否则使用纯数字
+        if row is not None and col is not None:
+            self.create_device_label(cell, label_x, label_y, row, col, label_type)
+        else:
+            # 将 device_id 转换为字符串，作为纯数字标记
+            self.create_device_label(cell, label_x, label_y, device_id - 1, 0, label_type)  # 假设为第0列
     
     def create_device_label(self, cell, x, y, row, col, label_type=None):
         """
@@ -427,7 +457,7 @@ class FET:
         """
         使用TextUtils创建器件标签（推荐方式）
         """
-        layer_id = LAYER_DEFINITIONS['labels']['id']
+        layer_shapes = cell.shapes(self._lid_labels)
         
         # 生成字母+数字格式的标记
         col_letter = chr(ord('A') + col)  # 0->A, 1->B, 2->C, ...
@@ -447,23 +477,28 @@ class FET:
             char_x = label_x + i * char_spacing
             char_y = label_y
             
-            # 使用 TextUtils 创建文本
-            text_shapes = TextUtils.create_text_freetype(
-                char, char_x, char_y, 
-                size_um=int(char_size), 
-                font_path=self.label_font,
-                spacing_um=0.5,
-                anchor=self.label_anchor
-            )
+            # 使用 TextUtils 创建文本（同一字符只栅格化一次）
+            key = (char, int(char_size), self.label_font, self.label_anchor)
+            text_shapes = self._glyph_cache.get(key)
+            if text_shapes is None:
+                text_shapes = TextUtils.create_text_freetype(
+                    char, 0.0, 0.0, 
+                    size_um=int(char_size), 
+                    font_path=self.label_font,
+                    spacing_um=0.5,
+                    anchor=self.label_anchor
+                )
+                self._glyph_cache[key] = text_shapes
             
+            trans = db.Trans(db.Vector(int(round(char_x * self._dbu_inv)), int(round(char_y * self._dbu_inv))))
             for shape in text_shapes:
-                cell.shapes(layer_id).insert(shape)
+                layer_shapes.insert(shape.transformed(trans))
     
     def _create_device_label_digital(self, cell, x, y, row, col):
         """
         使用DigitalDisplay创建器件标签（传统方式）
         """
-        layer_id = LAYER_DEFINITIONS['labels']['id']
+        layer_shapes = cell.shapes(self._lid_labels)
         
         # 生成字母+数字格式的标记
         col_letter = chr(ord('A') + col)  # 0->A, 1->B, 2->C, ...
@@ -484,15 +519,20 @@ class FET:
             char_x = label_x + i * char_spacing
             char_y = label_y
             
-            # 使用 DigitalDisplay 创建数字显示
-            polygons = DigitalDisplay.create_digit(
-                char, char_x, char_y, 
-                size=char_size, 
-                stroke_width=stroke_width
-            )
+            # 使用 DigitalDisplay 创建数字显示（同一字符只生成一次）
+            key = (char, char_size, stroke_width)
+            polygons = self._digit_cache.get(key)
+            if polygons is None:
+                polygons = DigitalDisplay.create_digit(
+                    char, 0.0, 0.0, 
+                    size=char_size, 
+                    stroke_width=stroke_width
+                )
+                self._digit_cache[key] = polygons
             
+            trans = db.Trans(db.Vector(int(round(char_x * self._dbu_inv)), int(round(char_y * self._dbu_inv))))
             for polygon in polygons:
-                cell.shapes(layer_id).insert(polygon)
+                layer_shapes.insert(polygon.transformed(trans))
     
     def create_parameter_labels(self, cell, x, y, device_params):
         """
@@ -503,7 +543,7 @@ class FET:
             x, y: 器件中心坐标
             device_params: 器件参数字典
         """
-        layer_id = LAYER_DEFINITIONS['labels']['id']
+        layer_shapes = cell.shapes(self._lid_labels)
         
         # 计算标注起始位置（器件中心上方）
         start_x = x - self.device_margin_x * 0.9  # 向左偏移
@@ -540,11 +580,11 @@ class FET:
             # 使用db.Text创建文本
             text_obj = db.Text(
                 text,
-                int(start_x * 1000),  # 转换为数据库单位
-                int(text_y * 1000)    # 转换为数据库单位
+                int(start_x * self._dbu_inv),  # 转换为数据库单位
+                int(text_y * self._dbu_inv)    # 转换为数据库单位
             )
             
-            cell.shapes(layer_id).insert(text_obj)
+            layer_shapes.insert(text_obj)
     
     def create_single_device(self, cell_name="FET_Device", x=0, y=0, device_id=None, row=None, col=None, device_params=None, label_type=None):
         """
@@ -568,20 +608,101 @@ class FET:
         x = float(x)
         y = float(y)
         
-        # 按层次顺序创建器件结构
+        # 按层次顺序创建器件结构；对准标记引用共享的标记单元格
+        self._create_device_geometry(cell, x, y)
+        cell.insert(db.CellInstArray(self._marks_cell().cell_index(), self._device_trans(x, y)))
+        if device_id is not None:
+            self._place_device_label(cell, x, y, device_id, row, col, label_type)
+        
+        # 如果有器件参数，添加参数标注
+        if device_params:
+            self.create_parameter_labels(cell, x, y, device_params)
+        
+        return cell
+    
+    def _create_device_geometry(self, cell, x, y):
+        """按层次顺序创建与编号无关的器件结构（电极、介质、沟道）"""
         self.create_bottom_gate_electrodes(cell, x, y)
         self.create_dielectric_layer(cell, x, y)
         self.create_channel_material(cell, x, y)
         self.create_source_drain_electrodes(cell, x, y)
         self.create_top_gate_electrode(cell, x, y)
-        self.create_alignment_marks(cell, x, y, device_id, row, col, label_type)
+    
+    def _device_prototype(self):
+        """
+        获取当前器件参数对应的原型单元格：几何在原点生成并引用共享的对准标记单元格，
+        相同参数的器件只生成一次，以实例平移引用
         
-        # 如果有器件参数，添加参数标注
+        Returns:
+            原型单元格
+        """
+        key = (self.ch_width, self.ch_len, self.gate_space, self.gate_width)
+        cell = self._device_cache.get(key)
+        if cell is None:
+            cell = self.layout.create_cell(f"FET_Unit_{len(self._device_cache) + 1:03d}")
+            self._create_device_geometry(cell, 0.0, 0.0)
+            cell.insert(db.CellInstArray(self._marks_cell().cell_index(), self._IDENTITY_TRANS))
+            self._device_cache[key] = cell
+        return cell
+    
+    def _marks_cell(self):
+        """
+        对准标记单元格：标记只取决于标记设置与器件边界，与器件参数无关，
+        因此在原点生成一次，各器件原型以实例引用
+        """
+        key = (
+            tuple(self.mark_types), tuple(self.mark_rotations), self.mark_size, self.mark_width,
+            self.device_margin_x, self.device_margin_y, self.mark_margin
+        )
+        cell = self._marks_cells.get(key)
+        if cell is None:
+            cell = self.layout.create_cell("FET_Alignment_Marks")
+            self.create_alignment_marks(cell, 0.0, 0.0)
+            self._marks_cells[key] = cell
+        return cell
+    
+    def _device_trans(self, x, y):
+        """器件中心坐标 (μm) 对应的实例平移"""
+        s = GeometryUtils.UNIT_SCALE
+        return db.Trans(db.Vector(int(round(x * s)), int(round(y * s))))
+    
+    def _create_label_cell(self, cell_name, x, y, device_id, row, col, device_params=None, label_type=None):
+        """
+        创建只含编号（及参数标注）的单元格，坐标与器件位置一致
+        
+        Returns:
+            标签单元格
+        """
+        cell = self.layout.create_cell(cell_name)
+        self._place_device_label(cell, x, y, device_id, row, col, label_type)
         if device_params:
             self.create_parameter_labels(cell, x, y, device_params)
-        
         return cell
     
+    @staticmethod
+    def _scan_axis_values(param_range, count):
+        """
+        参数扫描中一个方向上各位置的参数值
+        
+        Args:
+            param_range: [min, max, steps] 或 [value]，None 表示不扫描该参数
+            count: 该方向上的器件数（行数或列数）
+            
+        Returns:
+            长度为 count 的参数值列表，param_range 为 None 时返回 None
+        """
+        if param_range is None:
+            return None
+        if len(param_range) != 3:
+            return [param_range[0]] * count
+        min_val, max_val, steps = param_range
+        return [min_val + i * (max_val - min_val) / (steps - 1) for i in range(count)]
+    
+    @staticmethod
+    def _is_regular(coords):
+        """坐标序列是否等间距（可用规则阵列实例表示）"""
+        return all(b - a == coords[1] - coords[0] for a, b in zip(coords, coords[1:]))
+    
     def create_device_array(self, rows=10, cols=10, device_spacing_x=None, device_spacing_y=None, label_type=None):
         """
         创建器件阵列
@@ -605,26 +726,44 @@ class FET:
         # 创建阵列单元格
         array_cell = self.layout.create_cell("FET_Array")
         
-        # 创建器件阵列
+        # 各列/各行器件中心坐标
+        xs = [int(col * device_spacing_x) for col in range(cols)]
+        ys = [int(row * device_spacing_y) for row in range(rows)]
+        
+        # 所有器件参数相同，共享同一个原型单元格
+        proto_index = self._device_prototype().cell_index()
+        if self._is_regular(xs) and self._is_regular(ys):
+            # 等间距时以一个规则阵列实例放置全部器件
+            s = GeometryUtils.UNIT_SCALE
+            step_x = (xs[1] - xs[0]) * s if cols > 1 else 0
+            step_y = (ys[1] - ys[0]) * s if rows > 1 else 0
+            array_cell.insert(db.CellInstArray(
+                proto_index,
+                self._IDENTITY_TRANS,
+                db.Vector(step_x, 0),
+                db.Vector(0, step_y),
+                cols, rows
+            ))
+        else:
+            for device_y in ys:
+                for device_x in xs:
+                    array_cell.insert(db.CellInstArray(proto_index, self._device_trans(device_x, device_y)))
+        
+        # 编号随位置变化，每个位置单独生成一个只含编号的单元格
         device_id = 1
         for row in range(rows):
             for col in range(cols):
-                # 计算器件位置
-                device_x = int(col * device_spacing_x)
-                device_y = int(row * device_spacing_y)
-                
-                # 创建单个器件
-                device_cell = self.create_single_device(
-                    f"FET_{device_id:03d}", 
-                    device_x, device_y, 
+                label_cell = self._create_label_cell(
+                    f"FET_{device_id:03d}_Label",
+                    xs[col], ys[row],
                     device_id, row, col,
                     label_type=label_type
                 )
                 
-                # 将器件单元格插入到阵列中
+                # 将编号单元格插入到阵列中
                 array_cell.insert(db.CellInstArray(
-                    device_cell.cell_index(),
-                    db.Trans(0, 0)
+                    label_cell.cell_index(),
+                    self._IDENTITY_TRANS
                 ))
                 
                 device_id += 1
@@ -653,79 +792,56 @@ class FET:
         total_devices = rows * cols
         device_id = 1
         
-        # 计算参数步长
-        param_steps = {}
-        for param_name, param_range in param_ranges.items():
-            if len(param_range) == 3:
-                min_val, max_val, steps = param_range
-                param_steps[param_name] = (max_val - min_val) / (steps - 1) if steps > 1 else 0
-            else:
-                param_steps[param_name] = 0
+        # 预先计算每行/每列的参数值：行扫描沟道宽度，列扫描沟道长度与栅极间距
+        ch_widths = self._scan_axis_values(param_ranges.get('ch_width'), rows)
+        ch_lens = self._scan_axis_values(param_ranges.get('ch_len'), cols)
+        gate_spaces = self._scan_axis_values(param_ranges.get('gate_space'), cols)
         
         # 计算器件间距
         device_spacing_x = self.device_margin_x * 2 + 50
         device_spacing_y = self.device_margin_y * 2 + 50
         
+        # 各列/各行器件中心坐标（加上偏移）一次性算好
+        xs = [int(offset_x + col * device_spacing_x) for col in range(cols)]
+        ys = [int(offset_y + row * device_spacing_y) for row in range(rows)]
+        
         # 创建器件阵列
         for row in range(rows):
+            device_y = ys[row]
             for col in range(cols):
+                device_x = xs[col]
+                
                 # 计算当前器件的参数值
                 current_params = {}
-                
-                # 行扫描：沟道宽度
-                if 'ch_width' in param_ranges:
-                    ch_width_range = param_ranges['ch_width']
-                    if len(ch_width_range) == 3:
-                        min_val, max_val, steps = ch_width_range
-                        ch_width = min_val + row * (max_val - min_val) / (steps - 1)
-                        current_params['ch_width'] = ch_width
-                    else:
-                        current_params['ch_width'] = ch_width_range[0]
-                
-                # 列扫描：沟道长度
-                if 'ch_len' in param_ranges:
-                    ch_len_range = param_ranges['ch_len']
-                    if len(ch_len_range) == 3:
-                        min_val, max_val, steps = ch_len_range
-                        ch_len = min_val + col * (max_val - min_val) / (steps - 1)
-                        current_params['ch_len'] = ch_len
-                    else:
-                        current_params['ch_len'] = ch_len_range[0]
-                
-                # 列扫描：gate_space
-                if 'gate_space' in param_ranges:
-                    gate_space_range = param_ranges['gate_space']
-                    if len(gate_space_range) == 3:
-                        min_val, max_val, steps = gate_space_range
-                        gate_space = min_val + col * (max_val - min_val) / (steps - 1)
-                        current_params['gate_space'] = gate_space
-                    else:
-                        current_params['gate_space'] = gate_space_range[0]
-                
-                # gate_width 固定为 ch_len/2
-                if 'ch_len' in current_params:
-                    current_params['gate_width'] = current_params['ch_len'] / 2
+                if ch_widths is not None:
+                    current_params['ch_width'] = ch_widths[row]
+                if ch_lens is not None:
+                    current_params['ch_len'] = ch_lens[col]
+                    # gate_width 固定为 ch_len/2
+                    current_params['gate_width'] = ch_lens[col] / 2
+                if gate_spaces is not None:
+                    current_params['gate_space'] = gate_spaces[col]
                 
                 # 设置当前器件的参数
                 self.set_device_parameters(**current_params)
                 
-                # 计算器件位置（加上偏移）
-                device_x = int(offset_x + col * device_spacing_x)
-                device_y = int(offset_y + row * device_spacing_y)
+                # 相同参数的器件共享原型单元格，平移到器件位置
+                scan_cell.insert(db.CellInstArray(
+                    self._device_prototype().cell_index(),
+                    self._device_trans(device_x, device_y)
+                ))
                 
-                # 创建单个器件
-                device_cell = self.create_single_device(
-                    f"FET_Scan_{device_id:03d}", 
-                    device_x, device_y, 
+                # 编号与参数标注随器件变化，单独成单元格
+                label_cell = self._create_label_cell(
+                    f"FET_Scan_{device_id:03d}_Label",
+                    device_x, device_y,
                     device_id, row, col,
                     current_params,
                     label_type=label_type
                 )
-                
-                # 将器件单元格插入到扫描阵列中
                 scan_cell.insert(db.CellInstArray(
-                    device_cell.cell_index(),
-                    db.Trans(0, 0)
+                    label_cell.cell_index(),
+                    self._IDENTITY_TRANS
                 ))
                 
                 device_id += 1
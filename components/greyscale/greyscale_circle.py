@@ -7,6 +7,7 @@ Creates single-channel 8-bit images with angular gradient and tick marks for gra
 import numpy as np
 from PIL import Image
 import os
+import struct
 
 # =============================================================================
 # PARAMETERS
@@ -47,6 +48,17 @@ COLORBAR_HEIGHT = int(100 * 0.7)  # 70% narrower (70 pixels)
 COLORBAR_X = (WIDTH - COLORBAR_WIDTH) // 2  # Center horizontally
 COLORBAR_Y = HEIGHT - COLORBAR_HEIGHT - 60  # Move up to balance with circle
 
+# Gray levels closer than this to a .5 rounding tie are recomputed in float64
+TIE_TOLERANCE = 1e-3
+
+# Side of the square blocks the gradient is computed in
+GRADIENT_TILE = 256
+
+# Pixel index grids for the default canvas (column vector of rows, row vector of
+# columns), built once at import and shared by the radial computations
+_Y_GRID = np.arange(HEIGHT, dtype=np.int32)[:, None]
+_X_GRID = np.arange(WIDTH, dtype=np.int32)[None, :]
+
 # Output format control
 OUTPUT_FORMAT = "BMP"  # Options: "BMP", "TIFF", "BOTH"
 OUTPUT_BOTH = False  # If True, save both formats regardless of OUTPUT_FORMAT
@@ -63,51 +75,124 @@ BMP_FILENAME = get_image_path("greyscale_angular_circle_1024.bmp")
 # FUNCTIONS
 # =============================================================================
 
-def generate_gradient_image(width, height, cx, cy, radius, background_gray=0, circle_outside_gray=0):
+def pixel_grids(width, height):
     """
-    Generate a single-channel 8-bit image with angular gradient.
+    Return (y, x) int32 index grids shaped (height, 1) and (1, width).
+    
+    The module-level grids are reused for the default canvas size.
+    """
+    if (height, width) == (HEIGHT, WIDTH):
+        return _Y_GRID, _X_GRID
+    return np.arange(height, dtype=np.int32)[:, None], np.arange(width, dtype=np.int32)[None, :]
+
+def build_radial(width, height, cx, cy, grids=None):
+    """
+    Compute the squared distance of every pixel from the circle center.
     
     Args:
         width, height: Canvas dimensions
         cx, cy: Circle center coordinates
-        radius: Circle radius
-        background_gray: Background pixel value
-        circle_outside_gray: Pixel value outside circle
+        grids: Optional (y, x) index grids from pixel_grids() to reuse
         
     Returns:
-        np.ndarray: Single-channel uint8 image array
+        np.ndarray: (height, width) array of dx*dx + dy*dy (int32 for integer centers)
     """
-    # Create coordinate grids
-    y, x = np.ogrid[:height, :width]
-    
-    # Calculate distances from center
+    y, x = grids if grids is not None else pixel_grids(width, height)
     dx = x - cx
     dy = y - cy
-    distance = np.sqrt(dx**2 + dy**2)
-    
-    # Create circle mask
-    circle_mask = distance <= radius
+    return dx * dx + dy * dy
+
+def angle_to_gray(dy, dx):
+    """
+    Map pixel offsets to angular gray levels in float64.
     
-    # Calculate angles (atan2 gives [-π, π], convert to [0, 360) degrees)
-    angles_rad = np.arctan2(dy, dx)
-    angles_deg = np.degrees(angles_rad)
+    Args:
+        dy, dx: Offsets from the circle center (broadcastable arrays)
+        
+    Returns:
+        np.ndarray: uint8 gray values, 0 at 0° rising to 255 at 360°
+    """
+    angles_deg = np.degrees(np.arctan2(dy, dx))
     angles_deg = np.where(angles_deg < 0, angles_deg + 360, angles_deg)
+    return np.round((angles_deg / 360.0) * 255).astype(np.uint8)
+
+def gradient_tile(dy, dx):
+    """
+    Compute angular gray levels for a block of pixels in float32.
     
-    # Map angles to grayscale values [0, 255]
-    grayscale_values = np.round((angles_deg / 360.0) * 255).astype(np.uint8)
+    Args:
+        dy: Column vector of row offsets from the circle center
+        dx: Row vector of column offsets from the circle center
+        
+    Returns:
+        np.ndarray: uint8 gray values with the same result as angle_to_gray()
+    """
+    # Calculate angles (atan2 gives [-π, π], convert to [0, 360) degrees);
+    # the whole chain works in place on the single arctan2 buffer
+    angles_deg = np.arctan2(dy.astype(np.float32), dx.astype(np.float32))
+    np.degrees(angles_deg, out=angles_deg)
+    np.add(angles_deg, np.float32(360), out=angles_deg, where=angles_deg < 0)
     
-    # Initialize image with background
-    image = np.full((height, width), background_gray, dtype=np.uint8)
+    # Map angles to grayscale values [0, 255]
+    levels = angles_deg
+    np.divide(levels, np.float32(360.0), out=levels)
+    np.multiply(levels, np.float32(255), out=levels)
+    
+    # float32 error can flip the rounding of levels lying within a hair of .5;
+    # those few pixels are recomputed in float64 so the output matches exactly
+    tie_distance = np.floor(levels)
+    np.subtract(levels, tie_distance, out=tie_distance)
+    np.subtract(tie_distance, np.float32(0.5), out=tie_distance)
+    np.abs(tie_distance, out=tie_distance)
+    tie_y, tie_x = np.nonzero(tie_distance < TIE_TOLERANCE)
+    
+    np.rint(levels, out=levels)
+    grayscale_values = levels.astype(np.uint8)
+    grayscale_values[tie_y, tie_x] = angle_to_gray(dy[tie_y, 0], dx[tie_x])
+    return grayscale_values
+
+def generate_gradient_image(width, height, cx, cy, radius, background_gray=0, circle_outside_gray=0,
+                            dist2=None, grids=None):
+    """
+    Generate a single-channel 8-bit image with angular gradient.
     
-    # Apply circle mask and gradient
-    image[circle_mask] = grayscale_values[circle_mask]
+    Args:
+        width, height: Canvas dimensions
+        cx, cy: Circle center coordinates
+        radius: Circle radius
+        background_gray: Background pixel value
+        circle_outside_gray: Pixel value outside circle
+        dist2: Optional squared-distance array from build_radial() to reuse
+        grids: Optional (y, x) index grids from pixel_grids() to reuse
+        
+    Returns:
+        np.ndarray: Single-channel uint8 image array
+    """
+    y, x = grids if grids is not None else pixel_grids(width, height)
+    if dist2 is None:
+        dist2 = build_radial(width, height, cx, cy, grids=(y, x))
     
-    # Set area outside circle
-    image[~circle_mask] = circle_outside_gray
+    dx = x[0] - cx
+    dy = y - cy
+    outside_gray = np.uint8(circle_outside_gray)
+    image = np.empty((height, width), dtype=np.uint8)
+    
+    # Work tile by tile so each tile's float32 scratch stays cache-resident
+    for by in range(0, height, GRADIENT_TILE):
+        for bx in range(0, width, GRADIENT_TILE):
+            rows = slice(by, by + GRADIENT_TILE)
+            cols = slice(bx, bx + GRADIENT_TILE)
+            
+            # Create circle mask from the squared distance (no sqrt pass needed)
+            circle_mask = dist2[rows, cols] <= radius * radius
+            
+            # Gradient inside the circle, circle_outside_gray everywhere else; the two
+            # regions cover the whole tile, so no separate background fill is needed
+            image[rows, cols] = np.where(circle_mask, gradient_tile(dy[rows], dx[cols]), outside_gray)
     
     return image
 
-def draw_circle_border(image, cx, cy, radius, border_width, border_gray):
+def draw_circle_border(image, cx, cy, radius, border_width, border_gray, dist2=None, grids=None):
     """
     Draw a white border around the circle.
     
@@ -117,19 +202,15 @@ def draw_circle_border(image, cx, cy, radius, border_width, border_gray):
         radius: Circle radius
         border_width: Width of the border
         border_gray: Pixel value for border
+        dist2: Optional squared-distance array from build_radial() to reuse
+        grids: Optional (y, x) index grids from pixel_grids() to reuse
     """
-    height, width = image.shape
-    
-    # Create coordinate grids
-    y, x = np.ogrid[:height, :width]
-    dx = x - cx
-    dy = y - cy
-    distance = np.sqrt(dx**2 + dy**2)
+    if dist2 is None:
+        height, width = image.shape
+        dist2 = build_radial(width, height, cx, cy, grids=grids)
     
     # Create border mask (ring around the circle)
-    outer_mask = distance <= radius + border_width
-    inner_mask = distance <= radius
-    border_mask = outer_mask & ~inner_mask
+    border_mask = (dist2 <= (radius + border_width)**2) & (dist2 > radius * radius)
     
     # Apply border
     image[border_mask] = border_gray
@@ -178,19 +259,20 @@ def draw_l_mark(image, start_x, start_y, size, thickness, gray_value, h_dir, v_d
     end_x = start_x + h_dir * size
     end_y = start_y + v_dir * size
     
-    # Draw horizontal line with proper thickness
-    for x in range(min(start_x, end_x), max(start_x, end_x) + 1):
-        for dy in range(-thickness//2, thickness//2 + 1):
-            y = start_y + dy
-            if 0 <= x < width and 0 <= y < height:
-                image[y, x] = gray_value
+    # Line thickness spans offsets [-thickness//2, thickness//2] around the start point
+    lo, hi = -thickness//2, thickness//2 + 1
     
-    # Draw vertical line with proper thickness
-    for y in range(min(start_y, end_y), max(start_y, end_y) + 1):
-        for dx in range(-thickness//2, thickness//2 + 1):
-            x = start_x + dx
-            if 0 <= x < width and 0 <= y < height:
-                image[y, x] = gray_value
+    # Draw horizontal line with proper thickness (clipped rectangle fill)
+    x0, x1 = max(min(start_x, end_x), 0), min(max(start_x, end_x) + 1, width)
+    y0, y1 = max(start_y + lo, 0), min(start_y + hi, height)
+    if x0 < x1 and y0 < y1:
+        image[y0:y1, x0:x1] = gray_value
+    
+    # Draw vertical line with proper thickness (clipped rectangle fill)
+    x0, x1 = max(start_x + lo, 0), min(start_x + hi, width)
+    y0, y1 = max(min(start_y, end_y), 0), min(max(start_y, end_y) + 1, height)
+    if x0 < x1 and y0 < y1:
+        image[y0:y1, x0:x1] = gray_value
 
 def draw_tick_marks(image, cx, cy, radius, tick_angles, tick_length, tick_thickness, tick_gray):
     """
@@ -207,6 +289,11 @@ def draw_tick_marks(image, cx, cy, radius, tick_angles, tick_length, tick_thickn
     """
     height, width = image.shape
     
+    # Circular stamp of radius thickness//2, shared by every sample point
+    r = tick_thickness // 2
+    offsets = np.arange(-r, r + 1)
+    kernel = offsets[:, None]**2 + offsets[None, :]**2 <= r * r
+    
     for angle_deg in tick_angles:
         # Convert angle to radians
         angle_rad = np.radians(angle_deg)
@@ -215,28 +302,21 @@ def draw_tick_marks(image, cx, cy, radius, tick_angles, tick_length, tick_thickn
         ux = np.cos(angle_rad)
         uy = np.sin(angle_rad)
         
-        # Generate points along the tick mark
-        tick_points = []
-        
         # Sample points from (R - tick_length) to R
-        for t in np.linspace(radius - tick_length, radius, max(tick_length, 1)):
-            x = int(cx + t * ux)
-            y = int(cy + t * uy)
-            
-            # Check bounds
-            if 0 <= x < width and 0 <= y < height:
-                tick_points.append((x, y))
+        t = np.linspace(radius - tick_length, radius, max(tick_length, 1))
+        xs = (cx + t * ux).astype(np.int64)
+        ys = (cy + t * uy).astype(np.int64)
         
-        # Apply thickness using morphological dilation approach
+        # Keep in-bounds points; neighbouring samples often land on the same pixel
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        tick_points = np.unique(np.stack([xs[inside], ys[inside]], axis=1), axis=0)
+        
+        # Apply thickness by stamping the disk kernel at each point (clipped to the image)
         for x, y in tick_points:
-            # Draw thick line by filling neighborhood
-            for dx in range(-tick_thickness//2, tick_thickness//2 + 1):
-                for dy in range(-tick_thickness//2, tick_thickness//2 + 1):
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < width and 0 <= ny < height:
-                        # Check if point is within thickness distance
-                        if dx*dx + dy*dy <= (tick_thickness//2)**2:
-                            image[ny, nx] = tick_gray
+            x0, x1 = max(x - r, 0), min(x + r + 1, width)
+            y0, y1 = max(y - r, 0), min(y + r + 1, height)
+            window = image[y0:y1, x0:x1]
+            window[kernel[y0 - (y - r):y1 - (y - r), x0 - (x - r):x1 - (x - r)]] = tick_gray
 
 def draw_colorbar(image, x, y, width, height):
     """
@@ -247,37 +327,65 @@ def draw_colorbar(image, x, y, width, height):
         x, y: Top-left corner of colorbar
         width, height: Colorbar dimensions
     """
-    # Create horizontal gradient from 0 to 255
-    for j in range(width):
-        # Map horizontal position to grayscale value (0 at left, 255 at right)
-        gray_value = int((j / (width - 1)) * 255)
-        
-        # Fill the colorbar row
-        for i in range(height):
-            if 0 <= x + j < image.shape[1] and 0 <= y + i < image.shape[0]:
-                image[y + i, x + j] = gray_value
+    img_h, img_w = image.shape
+    
+    # Create horizontal gradient from 0 to 255 (0 at left, 255 at right)
+    gradient = (np.arange(width) / (width - 1) * 255).astype(np.uint8)
+    
+    # Fill the colorbar by broadcasting the gradient row (clipped to the image)
+    gx0, gx1 = max(x, 0), min(x + width, img_w)
+    gy0, gy1 = max(y, 0), min(y + height, img_h)
+    if gx0 < gx1 and gy0 < gy1:
+        image[gy0:gy1, gx0:gx1] = gradient[gx0 - x:gx1 - x]
     
     # Add border around colorbar using unified border width
     border_gray = 255
     border_width = BORDER_WIDTH
+    if border_width <= 0:
+        return
+    
+    # The border is a frame whose innermost ring overlaps the colorbar edge:
+    # outer rectangle minus inner rectangle, drawn as four clipped slices
+    ox0, ox1 = max(x - border_width + 1, 0), min(x + width + border_width - 1, img_w)
+    oy0, oy1 = max(y - border_width + 1, 0), min(y + height + border_width - 1, img_h)
+    ix0, ix1 = min(max(x + 1, ox0), ox1), max(min(x + width - 1, ox1), ox0)
+    iy0, iy1 = min(max(y + 1, oy0), oy1), max(min(y + height - 1, oy1), oy0)
+    if ox0 >= ox1 or oy0 >= oy1:
+        return
+    image[oy0:iy0, ox0:ox1] = border_gray
+    image[iy1:oy1, ox0:ox1] = border_gray
+    image[oy0:oy1, ox0:ix0] = border_gray
+    image[oy0:oy1, ix1:ox1] = border_gray
+
+def write_bmp_8bit(path, image):
+    """
+    Write a uint8 image as an uncompressed 8-bit grayscale BMP without PIL.
     
-    # Draw border with specified width
-    for bw in range(border_width):
-        # Top and bottom borders
-        for j in range(width + 2 * bw):
-            if 0 <= x - bw + j < image.shape[1]:
-                if 0 <= y - bw < image.shape[0]:
-                    image[y - bw, x - bw + j] = border_gray
-                if 0 <= y + height + bw - 1 < image.shape[0]:
-                    image[y + height + bw - 1, x - bw + j] = border_gray
-        
-        # Left and right borders
-        for i in range(height + 2 * bw):
-            if 0 <= y - bw + i < image.shape[0]:
-                if 0 <= x - bw < image.shape[1]:
-                    image[y - bw + i, x - bw] = border_gray
-                if 0 <= x + width + bw - 1 < image.shape[1]:
-                    image[y - bw + i, x + width + bw - 1] = border_gray
+    Args:
+        path: Output filename
+        image: 2-D uint8 image array
+    """
+    height, width = image.shape
+    stride = (width + 3) & ~3  # BMP rows are padded to a multiple of 4 bytes
+    palette_size = 256 * 4
+    data_offset = 14 + 40 + palette_size
+    ppm = 3780  # 96 dpi in pixels per metre
+    
+    # BITMAPFILEHEADER + BITMAPINFOHEADER (positive height = bottom-up rows)
+    header = struct.pack('<2sIHHI', b'BM', data_offset + stride * height, 0, 0, data_offset)
+    header += struct.pack('<IiiHHIIiiII', 40, width, height, 1, 8, 0,
+                          stride * height, ppm, ppm, 256, 256)
+    
+    # Grayscale palette: entry i is (B, G, R, 0) = (i, i, i, 0)
+    palette = np.repeat(np.arange(256, dtype=np.uint8), 4).reshape(256, 4)
+    palette[:, 3] = 0
+    
+    rows = np.pad(image[::-1], ((0, 0), (0, stride - width)))
+    
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(palette.tobytes())
+        f.write(np.ascontiguousarray(rows, dtype=np.uint8).tobytes())
 
 def save_image(image, tiff_filename, bmp_filename, output_format="BMP", output_both=False):
     """
@@ -290,20 +398,17 @@ def save_image(image, tiff_filename, bmp_filename, output_format="BMP", output_b
         output_format: Output format ("BMP", "TIFF", "BOTH")
         output_both: If True, save both formats regardless of output_format
     """
-    # Convert to PIL Image
-    pil_image = Image.fromarray(image, mode='L')
-    
     # Determine what to save
     save_tiff = (output_format == "TIFF" or output_format == "BOTH" or output_both)
     save_bmp = (output_format == "BMP" or output_format == "BOTH" or output_both)
     
-    # Save files
+    # Save files (BMP is written directly; only TIFF goes through PIL)
     if save_tiff:
-        pil_image.save(tiff_filename, format='TIFF')
+        Image.fromarray(image, mode='L').save(tiff_filename, format='TIFF')
         print(f"Saved TIFF: {tiff_filename}")
     
     if save_bmp:
-        pil_image.save(bmp_filename, format='BMP')
+        write_bmp_8bit(bmp_filename, image)
         print(f"Saved BMP: {bmp_filename}")
 
 def verify_image(image, cx, cy, radius):
@@ -361,6 +466,9 @@ def main():
     """
     print("Generating greyscale angular circle image...")
     
+    # Squared distances from the circle center, shared by the gradient and border
+    dist2 = build_radial(WIDTH, HEIGHT, CX, CY)
+    
     # Generate the gradient image
     image = generate_gradient_image(
         width=WIDTH,
@@ -369,7 +477,8 @@ def main():
         cy=CY,
         radius=RADIUS,
         background_gray=BACKGROUND_GRAY,
-        circle_outside_gray=CIRCLE_OUTSIDE_GRAY
+        circle_outside_gray=CIRCLE_OUTSIDE_GRAY,
+        dist2=dist2
     )
     
     # Draw circle border
@@ -379,7 +488,8 @@ def main():
         cy=CY,
         radius=RADIUS,
         border_width=BORDER_WIDTH,
-        border_gray=BORDER_GRAY
+        border_gray=BORDER_GRAY,
+        dist2=dist2
     )
     
     # Draw tick marks
@@ -354,19 +354,20 @@ def draw_l_mark(image, start_x, start_y, size, thickness, gray_value, h_dir, v_d
     end_x = start_x + h_dir * size
     end_y = start_y + v_dir * size
     
-    # Draw horizontal line with proper thickness
-    for x in range(min(start_x, end_x), max(start_x, end_x) + 1):
-        for dy in range(-thickness//2, thickness//2 + 1):
-            y = start_y + dy
-            if 0 <= x < width and 0 <= y < height:
-                image[y, x] = gray_value
-    
-    # Draw vertical line with proper thickness
-    for y in range(min(start_y, end_y), max(start_y, end_y) + 1):
-        for dx in range(-thickness//2, thickness//2 + 1):
-            x = start_x + dx
-            if 0 <= x < width and 0 <= y < height:
-                image[y, x] = gray_value
+    # Line thickness spans offsets [-thickness//2, thickness//2] around the start point
+    lo, hi = -thickness//2, thickness//2 + 1
+    
+    # Draw horizontal line with proper thickness (clipped rectangle fill)
+    x0, x1 = max(min(start_x, end_x), 0), min(max(start_x, end_x) + 1, width)
+    y0, y1 = max(start_y + lo, 0), min(start_y + hi, height)
+    if x0 < x1 and y0 < y1:
+        image[y0:y1, x0:x1] = gray_value
+    
+    # Draw vertical line with proper thickness (clipped rectangle fill)
+    x0, x1 = max(start_x + lo, 0), min(start_x + hi, width)
+    y0, y1 = max(min(start_y, end_y), 0), min(max(start_y, end_y) + 1, height)
+    if x0 < x1 and y0 < y1:
+        image[y0:y1, x0:x1] = gray_value
 
 def save_image(image, png_filename):
     """
@@ -281,19 +281,20 @@ def draw_l_mark(image, start_x, start_y, size, thickness, gray_value, h_dir, v_d
     end_x = start_x + h_dir * size
     end_y = start_y + v_dir * size
     
-    # Draw horizontal line with proper thickness
-    for x in range(min(start_x, end_x), max(start_x, end_x) + 1):
-        for dy in range(-thickness//2, thickness//2 + 1):
-            y = start_y + dy
-            if 0 <= x < width and 0 <= y < height:
-                image[y, x] = gray_value
-    
-    # Draw vertical line with proper thickness
-    for y in range(min(start_y, end_y), max(start_y, end_y) + 1):
-        for dx in range(-thickness//2, thickness//2 + 1):
-            x = start_x + dx
-            if 0 <= x < width and 0 <= y < height:
-                image[y, x] = gray_value
+    # Line thickness spans offsets [-thickness//2, thickness//2] around the start point
+    lo, hi = -thickness//2, thickness//2 + 1
+    
+    # Draw horizontal line with proper thickness (clipped rectangle fill)
+    x0, x1 = max(min(start_x, end_x), 0), min(max(start_x, end_x) + 1, width)
+    y0, y1 = max(start_y + lo, 0), min(start_y + hi, height)
+    if x0 < x1 and y0 < y1:
+        image[y0:y1, x0:x1] = gray_value
+    
+    # Draw vertical line with proper thickness (clipped rectangle fill)
+    x0, x1 = max(start_x + lo, 0), min(start_x + hi, width)
+    y0, y1 = max(min(start_y, end_y), 0), min(max(start_y, end_y) + 1, height)
+    if x0 < x1 and y0 < y1:
+        image[y0:y1, x0:x1] = gray_value
 
 def draw_colorbar(image, x, y, width, height):
     """
@@ -304,37 +305,35 @@ def draw_colorbar(image, x, y, width, height):
         x, y: Top-left corner of colorbar
         width, height: Colorbar dimensions
     """
-    # Create horizontal gradient from 0 to 255
-    for j in range(width):
-        # Map horizontal position to grayscale value (0 at left, 255 at right)
-        gray_value = int((j / (width - 1)) * 255)
-        
-        # Fill the colorbar row
-        for i in range(height):
-            if 0 <= x + j < image.shape[1] and 0 <= y + i < image.shape[0]:
-                image[y + i, x + j] = gray_value
+    img_h, img_w = image.shape
+    
+    # Create horizontal gradient from 0 to 255 (0 at left, 255 at right)
+    gradient = (np.arange(width) / (width - 1) * 255).astype(np.uint8)
+    
+    # Fill the colorbar by broadcasting the gradient row (clipped to the image)
+    gx0, gx1 = max(x, 0), min(x + width, img_w)
+    gy0, gy1 = max(y, 0), min(y + height, img_h)
+    if gx0 < gx1 and gy0 < gy1:
+        image[gy0:gy1, gx0:gx1] = gradient[gx0 - x:gx1 - x]
     
     # Add border around colorbar using unified border width
     border_gray = 255
     border_width = BORDER_WIDTH
-    
-    # Draw border with specified width
-    for bw in range(border_width):
-        # Top and bottom borders
-        for j in range(width + 2 * bw):
-            if 0 <= x - bw + j < image.shape[1]:
-                if 0 <= y - bw < image.shape[0]:
-                    image[y - bw, x - bw + j] = border_gray
-                if 0 <= y + height + bw - 1 < image.shape[0]:
-                    image[y + height + bw - 1, x - bw + j] = border_gray
-        
-        # Left and right borders
-        for i in range(height + 2 * bw):
-            if 0 <= y - bw + i < image.shape[0]:
-                if 0 <= x - bw < image.shape[1]:
-                    image[y - bw + i, x - bw] = border_gray
-                if 0 <= x + width + bw - 1 < image.shape[1]:
-                    image[y - bw + i, x + width + bw - 1] = border_gray
+    if border_width <= 0:
+        return
+    
+    # The border is a frame whose innermost ring overlaps the colorbar edge:
+    # outer rectangle minus inner rectangle, drawn as four clipped slices
+    ox0, ox1 = max(x - border_width + 1, 0), min(x + width + border_width - 1, img_w)
+    oy0, oy1 = max(y - border_width + 1, 0), min(y + height + border_width - 1, img_h)
+    ix0, ix1 = min(max(x + 1, ox0), ox1), max(min(x + width - 1, ox1), ox0)
+    iy0, iy1 = min(max(y + 1, oy0), oy1), max(min(y + height - 1, oy1), oy0)
+    if ox0 >= ox1 or oy0 >= oy1:
+        return
+    image[oy0:iy0, ox0:ox1] = border_gray
+    image[iy1:oy1, ox0:ox1] = border_gray
+    image[oy0:oy1, ox0:ix0] = border_gray
+    image[oy0:oy1, ix1:ox1] = border_gray
 
 def save_image(image, tiff_filename, bmp_filename, output_format="BMP", output_both=False):
     """
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Regression tests for the cached writefield base cell in mark_writefield_gdsfactory.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+gf = pytest.importorskip("gdsfactory")
+kdb = pytest.importorskip("klayout.db")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "components" / "MyLayoutTemplate"))
+import mark_writefield_gdsfactory as mwf  # noqa: E402
+
+# 2 x 2 fields keep the arrays small
+SMALL_ARRAY = dict(
+    sample_width=4000.0,
+    sample_height=4000.0,
+    active_width=2000.0,
+    active_height=2000.0,
+    writefield_size=1000.0,
+)
+
+
+def _mark_region(component):
+    layer_index = component.kcl.layer(*mwf._layer_tuple(mwf.LAYER.MARK))
+    return kdb.Region(component.begin_shapes_rec(layer_index))
+
+
+def test_writefield_array_reflects_mark_settings():
+    first = _mark_region(mwf.generate_writefield_array(mark_main_size=80.0, **SMALL_ARRAY))
+    second = _mark_region(mwf.generate_writefield_array(mark_main_size=60.0, **SMALL_ARRAY))
+    again = _mark_region(mwf.generate_writefield_array(mark_main_size=80.0, **SMALL_ARRAY))
+
+    # Different marks must not reuse the first call's base field across the grid
+    assert not (first ^ second).is_empty()
+    # Same settings still reuse the cached base field
+    assert (first ^ again).is_empty()
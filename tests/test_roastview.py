@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Regression tests for the roastView ASCII coordinate-block parser.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "components" / "RaithEBL"))
+import roastView  # noqa: E402
+
+# One 1-token line and one 3-token line: 2 tokens per line in total, but not per line
+MIXED_BLOCK = "-0.97\n-526 -3.65 7806.44\n10 20\n"
+MIXED_POINTS = [[-526.0, -3.65], [10.0, 20.0]]
+
+
+def test_parse_points_mixed_token_counts():
+    pts = roastView._parse_points(MIXED_BLOCK)
+    assert np.asarray(pts).tolist() == MIXED_POINTS
+    assert np.asarray(pts).tolist() == [list(p) for p in roastView._parse_points_slow(MIXED_BLOCK)]
+
+
+@pytest.mark.parametrize("max_polys, max_segs", [(0, 0), (1, 1)])
+def test_parse_asc_mixed_token_block(tmp_path, max_polys, max_segs):
+    asc = tmp_path / "mixed.asc"
+    asc.write_text(
+        "1 100.0 0\n" + MIXED_BLOCK + "#\n"
+        "L 100.000 1 0.0\n-0.97\n1 2 3\n4 5\n#\n"
+    )
+    polys, segs = roastView.parse_asc(asc, max_polys, max_segs)
+
+    assert len(polys) == 1
+    assert np.asarray(polys[0].pts).tolist() == MIXED_POINTS
+    assert len(segs) == 1
+    seg = segs[0]
+    assert tuple(seg.p1) == (1.0, 2.0)
+    assert tuple(seg.p2) == (4.0, 5.0)
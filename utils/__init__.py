@@ -3,40 +3,32 @@
 工具模块包
 """
 
-__all__ = []
+import importlib
 
-try:
-    from .geometry import GeometryUtils
-    __all__.append('GeometryUtils')
-except Exception:
-    pass
+# 导出名 -> 所在子模块；子模块在首次访问时才导入，避免导入任一工具模块时
+# 连带加载全部工具（布线、螺旋电极等）
+_LAZY_EXPORTS = {
+    'GeometryUtils': '.geometry',
+    'TextUtils': '.text_utils',
+    'MarkUtils': '.mark_utils',
+    'RouteResult': '.routing_utils',
+    'RoutingUtils': '.routing_utils',
+    'AlignmentMark': '.alignment_utils',
+    'SpiralElectrodeResult': '.spiral_ide_utils',
+    'create_spiral_interdigitated_electrodes': '.spiral_ide_utils',
+}
 
-try:
-    from .text_utils import TextUtils
-    __all__.append('TextUtils')
-except Exception:
-    pass
+__all__ = list(_LAZY_EXPORTS)
 
-try:
-    from .mark_utils import MarkUtils
-    __all__.append('MarkUtils')
-except Exception:
-    pass
 
-try:
-    from .routing_utils import RouteResult, RoutingUtils
-    __all__.extend(['RouteResult', 'RoutingUtils'])
-except Exception:
-    pass
-
-try:
-    from .alignment_utils import AlignmentMark
-    __all__.append('AlignmentMark')
-except Exception:
-    pass
-
-try:
-    from .spiral_ide_utils import SpiralElectrodeResult, create_spiral_interdigitated_electrodes
-    __all__.extend(['SpiralElectrodeResult', 'create_spiral_interdigitated_electrodes'])
-except Exception:
-    pass
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    try:
+        module = importlib.import_module(module_name, __name__)
+    except Exception as exc:
+        raise AttributeError(f"module {__name__!r} cannot provide {name!r}: {exc}") from exc
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
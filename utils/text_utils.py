@@ -5,6 +5,7 @@ Text utilities for layout text handling (only freetype method)
 
 import sys
 import os
+from functools import lru_cache
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 try:
@@ -34,6 +35,13 @@ class TextUtils:
         """获取单位缩放"""
         return TextUtils.UNIT_SCALE
     
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _load_face(font_path):
+        """按路径缓存 freetype 字体对象，避免每个字符重复打开字体文件"""
+        import freetype
+        return freetype.Face(font_path)
+    
     @staticmethod
     def create_text_freetype(text, x, y, size_um=10, font_path='C:/Windows/Fonts/arial.ttf', spacing_um=2.0, anchor='right_top'):
         """
@@ -63,7 +71,7 @@ class TextUtils:
         
         polys_all = []
         # 计算字符串总宽度（nm）
-        face = freetype.Face(font_path)
+        face = TextUtils._load_face(font_path)
         face.set_char_size(int(size_um * 64))
         advances = []
         for char in text:
@@ -78,7 +86,6 @@ class TextUtils:
 
         for idx, char in enumerate(text):
             try:
-                face = freetype.Face(font_path)
                 face.set_char_size(int(size_um * 64))
                 face.load_char(char)
                 outline = face.glyph.outline